@@ -1,8 +1,21 @@
 """API layer components."""
 
-from app.api.dependencies import get_session_manager, SessionManagerDep
+from app.api.dependencies import (
+    get_session_manager,
+    get_graph_builder,
+    SessionManagerDep,
+    GraphBuilderDep,
+    get_neo4j_session,
+    Neo4jSessionDep,
+    RateLimiter,
+)
 
 __all__ = [
     "get_session_manager",
+    "get_graph_builder",
     "SessionManagerDep",
+    "GraphBuilderDep",
+    "get_neo4j_session",
+    "Neo4jSessionDep",
+    "RateLimiter",
 ]
\ No newline at end of file
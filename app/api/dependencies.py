@@ -2,54 +2,118 @@
 FastAPI dependencies for dependency injection.
 All heavy imports and initializations happen here once at startup.
 """
-from functools import lru_cache
-from typing import Annotated
-from fastapi import Depends, Header, HTTPException, status
+import time
+from functools import cache
+from typing import Annotated, AsyncGenerator, Optional
+from fastapi import Depends, HTTPException, Request, status
+from neo4j import WRITE_ACCESS, AsyncSession
 
 from app.core.config import settings
+from app.core.exceptions import Neo4jConnectionError
+from app.core.security import verify_api_key
 from app.services.session_manager2 import SessionManager
+from app.services.neo4j.database import Neo4jGraphCreation
+from app.services.neo4j.singleton import neo4j_driver
+from app.utils.rate_limit import TokenBuckets
 
 
 # ============================================================================
 # Service Dependencies (Singletons)
 # ============================================================================
 
-@lru_cache()
-def get_session_manager() -> SessionManager:
+_session_manager: Optional[SessionManager] = None
+
+
+async def get_session_manager() -> SessionManager:
     """
     Get SessionManager singleton instance.
-    Uses lru_cache to ensure only one instance is created.
+    Declared async so FastAPI resolves it on the event loop instead of the threadpool.
+    Creation has no await point, so concurrent requests cannot build two instances.
+    """
+    global _session_manager
+    if _session_manager is None:
+        _session_manager = SessionManager(
+            cache_dir=settings.cache_dir,
+            session_timeout=settings.session_timeout,
+            shrink_dtypes=settings.shrink_session_dtypes
+        )
+    return _session_manager
+
+
+@cache
+def get_graph_builder() -> Neo4jGraphCreation:
     """
-    return SessionManager(
-        cache_dir=settings.cache_dir,
-        session_timeout=settings.session_timeout
+    Get Neo4jGraphCreation singleton instance.
+    The underlying driver and its connection pool are shared by all requests
+    and closed once at application shutdown.
+    """
+    return Neo4jGraphCreation(
+        uri=settings.neo4j_uri,
+        user=settings.neo4j_username,
+        password=settings.neo4j_password,
+        database=settings.neo4j_database,
+        max_connection_pool_size=settings.neo4j_max_connection_pool_size,
+        connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout
     )
 
 
+async def get_neo4j_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get a request-scoped session of the shared Neo4j driver, tuned with settings.neo4j_fetch_size."""
+    try:
+        driver = await neo4j_driver.get_driver()
+    except Neo4jConnectionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message
+        )
+
+    async with driver._driver.session( # type: ignore
+        database=settings.neo4j_database,
+        fetch_size=settings.neo4j_fetch_size,
+        default_access_mode=WRITE_ACCESS,
+    ) as session:
+        yield session
+
+
 # Dependency injection aliases
 SessionManagerDep = Annotated[SessionManager, Depends(get_session_manager)]
+GraphBuilderDep = Annotated[Neo4jGraphCreation, Depends(get_graph_builder)]
+Neo4jSessionDep = Annotated[AsyncSession, Depends(get_neo4j_session)]
 
 # ============================================================================
 # Authentication Dependencies
 # ============================================================================
 
-async def verify_api_key(
-    x_api_key: str = Header(..., alias=settings.api_key_name)
-) -> str:
+# Optional: Use this dependency to protect endpoints
+ApiKeyDep = Annotated[str, Depends(verify_api_key)]
+
+
+# ============================================================================
+# Rate Limiting Dependencies
+# ============================================================================
+
+class RateLimiter:
     """
-    Verify API key from request header.
-    Raise 401 if invalid.
+    Per-endpoint rate limit backed by an in-process token bucket per client IP.
+    Attach only to expensive endpoints: Depends(RateLimiter(times=5, seconds=1)).
     """
-    if x_api_key != settings.api_key:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key"
-        )
-    return x_api_key
 
-
-# Optional: Use this dependency to protect endpoints
-ApiKeyDep = Annotated[str, Depends(verify_api_key)]
+    def __init__(self, times: int, seconds: float, max_tracked_ips: int = 50_000):
+        self.times = times
+        self.seconds = seconds
+        self.buckets = TokenBuckets(rate=times / seconds, capacity=times, max_keys=max_tracked_ips)
+
+    async def __call__(self, request: Request) -> None:
+        if not request.client:
+            return
+
+        allowed, tokens = self.buckets.acquire(request.client.host, time.monotonic())
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Rate limit exceeded. Maximum {self.times} requests per {self.seconds:g} second(s).",
+                headers={"Retry-After": str(self.buckets.retry_after(tokens))}
+            )
 
 
 # ============================================================================
@@ -5,14 +5,16 @@ Includes logging, rate limiting, security headers, and monitoring.
 import time
 import logging
 import uuid
-from typing import Callable, Dict
-from collections import defaultdict
+from typing import Callable
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Receive, Scope, Send
 
 from app.core.config import settings
+from app.core.logging import enable_queue_logging
+from app.utils.rate_limit import TokenBuckets
+from app.utils.serialization import DefaultJSONResponse
 
 logger = logging.getLogger(__name__)
 
@@ -64,6 +66,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         """
         super().__init__(app)
         self.log_bodies = log_bodies
+        # Emit request logs from a background thread so handler I/O stays off the event loop
+        enable_queue_logging(logger)
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Log request and response details."""
@@ -75,54 +79,36 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         user_agent = request.headers.get("user-agent", "unknown")
 
         # Start timing
-        start_time = time.time()
+        start_time = time.perf_counter()
 
         # Log incoming request
         logger.info(
-            f"Request started",
-            extra={
-                "request_id": request_id,
-                "method": method,
-                "url": url,
-                "client_ip": client_ip,
-                "user_agent": user_agent,
-            }
+            "Request started request_id=%s method=%s url=%s client_ip=%s user_agent=%s",
+            request_id, method, url, client_ip, user_agent
         )
 
         # Process request
         try:
             response = await call_next(request)
-            status_code = response.status_code
-            error = None
-        except Exception as e:
-            status_code = 500
-            error = str(e)
+        except Exception:
+            duration = time.perf_counter() - start_time
             logger.exception(
-                f"Request failed with exception",
-                extra={
-                    "request_id": request_id,
-                    "error": error,
-                }
+                "Request failed with exception request_id=%s %s %s after %.2fms",
+                request_id, method, url, duration * 1000
             )
             raise
-        finally:
-            # Calculate duration
-            duration = time.time() - start_time
-
-            # Log response
-            log_level = logging.ERROR if status_code >= 500 else logging.WARNING if status_code >= 400 else logging.INFO
-            logger.log(
-                log_level,
-                f"Request completed",
-                extra={
-                    "request_id": request_id,
-                    "method": method,
-                    "url": url,
-                    "status_code": status_code,
-                    "duration_ms": round(duration * 1000, 2),
-                    "error": error,
-                }
-            )
+
+        # Calculate duration
+        duration = time.perf_counter() - start_time
+
+        # Log response
+        status_code = response.status_code
+        log_level = logging.ERROR if status_code >= 500 else logging.WARNING if status_code >= 400 else logging.INFO
+        logger.log(
+            log_level,
+            "Request completed request_id=%s %s %s -> %d in %.2fms",
+            request_id, method, url, status_code, duration * 1000
+        )
 
         # Add timing header
         response.headers["X-Process-Time"] = f"{duration:.4f}"
@@ -130,13 +116,56 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         return response
 
 
+# ============================================================================
+# Request Size Limit Middleware
+# ============================================================================
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject requests whose declared Content-Length exceeds the limit.
+    Pure ASGI middleware: oversized bodies are refused before any byte is read.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int):
+        """
+        Initialize request size limit.
+
+        Args:
+            app: ASGI application
+            max_body_size: Max accepted request body size in bytes
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for name, value in scope["headers"]:
+                if name == b"content-length":
+                    if value.isdigit() and int(value) > self.max_body_size:
+                        response = DefaultJSONResponse(
+                            status_code=413,
+                            content={
+                                "error": {
+                                    "type": "RequestTooLarge",
+                                    "message": f"Request body exceeds the maximum of {self.max_body_size} bytes.",
+                                }
+                            },
+                            headers={"Connection": "close"}
+                        )
+                        await response(scope, receive, send)
+                        return
+                    break
+
+        await self.app(scope, receive, send)
+
+
 # ============================================================================
 # Rate Limiting Middleware
 # ============================================================================
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
-    Simple in-memory rate limiting.
+    Simple in-memory rate limiting using a per-IP token bucket.
     For production, use Redis-based rate limiting.
     """
 
@@ -144,105 +173,75 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
             self,
             app: ASGIApp,
             requests_per_minute: int = 60,
-            burst: int = 10
+            burst: int = 10,
+            max_tracked_ips: int = 50_000
     ):
         """
         Initialize rate limiting.
 
         Args:
             app: ASGI application
-            requests_per_minute: Max requests per minute per IP
-            burst: Max burst requests allowed
+            requests_per_minute: Max requests per minute per IP (bucket refill rate)
+            burst: Max burst requests allowed (bucket capacity)
+            max_tracked_ips: Max number of client IPs kept in memory (least recently seen are evicted)
+
+        IPs idle long enough for their bucket to refill completely are dropped as well,
+        since a full bucket is the same as no entry.
         """
         super().__init__(app)
         self.requests_per_minute = requests_per_minute
         self.burst = burst
-        self.requests: Dict[str, list] = defaultdict(list)
-        self.burst_requests: Dict[str, int] = defaultdict(int)
+        self.max_tracked_ips = max_tracked_ips
+        # Paths never counted against the limit (health probes, API docs)
+        self._skip_paths = frozenset({"/health", "/api/v1/health", "/docs", "/openapi.json", "/redoc"})
+        self.buckets = TokenBuckets(rate=requests_per_minute / 60.0, capacity=burst, max_keys=max_tracked_ips)
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Check rate limit and process request."""
-        # Skip rate limiting for health checks
-        if request.url.path in ["/health", "/api/v1/health"]:
+        # Skip rate limiting for health checks and docs (raw scope path avoids building a URL object)
+        if request.scope["path"] in self._skip_paths:
             return await call_next(request)
 
         if not request.client:
             return await call_next(request)
 
         client_ip = request.client.host
-        current_time = time.time()
-
-        # Clean old requests (older than 60 seconds)
-        self.requests[client_ip] = [
-            t for t in self.requests[client_ip]
-            if current_time - t < 60
-        ]
-
-        # Check burst limit
-        if self.burst_requests[client_ip] >= self.burst:
-            last_request_time = self.requests[client_ip][-1] if self.requests[client_ip] else 0
-            if current_time - last_request_time < 1:  # Within 1 second
-                logger.warning(
-                    f"Burst rate limit exceeded",
-                    extra={"client_ip": client_ip, "burst": self.burst}
-                )
-                from fastapi.responses import JSONResponse
-                return JSONResponse(
-                    status_code=429,
-                    content={
-                        "error": {
-                            "type": "RateLimitExceeded",
-                            "message": f"Burst limit exceeded. Maximum {self.burst} requests per second.",
-                        }
-                    },
-                    headers={
-                        "Retry-After": "1",
-                        "X-RateLimit-Limit": str(self.requests_per_minute),
-                        "X-RateLimit-Remaining": "0",
-                    }
-                )
+        allowed, tokens = self.buckets.acquire(client_ip, time.monotonic())
 
-        # Check rate limit
-        if len(self.requests[client_ip]) >= self.requests_per_minute:
+        if not allowed:
             logger.warning(
-                f"Rate limit exceeded",
+                "Rate limit exceeded",
                 extra={
                     "client_ip": client_ip,
-                    "requests_per_minute": self.requests_per_minute
+                    "requests_per_minute": self.requests_per_minute,
+                    "burst": self.burst,
                 }
             )
-            from fastapi.responses import JSONResponse
-            return JSONResponse(
+            return DefaultJSONResponse(
                 status_code=429,
                 content={
                     "error": {
                         "type": "RateLimitExceeded",
-                        "message": f"Rate limit exceeded. Maximum {self.requests_per_minute} requests per minute.",
+                        "message": (
+                            f"Rate limit exceeded. Maximum {self.requests_per_minute} requests per minute "
+                            f"(burst of {self.burst})."
+                        ),
                     }
                 },
                 headers={
-                    "Retry-After": "60",
+                    "Retry-After": str(self.buckets.retry_after(tokens)),
                     "X-RateLimit-Limit": str(self.requests_per_minute),
                     "X-RateLimit-Remaining": "0",
                 }
             )
 
-        # Add current request
-        self.requests[client_ip].append(current_time)
-        self.burst_requests[client_ip] += 1
-
-        # Reset burst counter every second
-        if not self.requests[client_ip] or current_time - self.requests[client_ip][0] >= 1:
-            self.burst_requests[client_ip] = 1
-
         # Process request
         response = await call_next(request)
 
         # Add rate limit headers
-        remaining = max(0, self.requests_per_minute - len(self.requests[client_ip]))
         response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-        response.headers["X-RateLimit-Reset"] = str(int(current_time + 60))
+        response.headers["X-RateLimit-Remaining"] = str(int(tokens))
+        response.headers["X-RateLimit-Reset"] = str(int(time.time() + self.buckets.seconds_to_full(tokens)))
 
         return response
 
@@ -257,6 +256,15 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     Helps protect against common web vulnerabilities.
     """
 
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        # Environment does not change at runtime, resolve header values once
+        self._is_dev = settings.is_development
+        # Content Security Policy (adjust as needed)
+        self._csp_header = None if self._is_dev else "default-src 'self'"
+        # Strict Transport Security (HTTPS only)
+        self._hsts_header = None if self._is_dev else "max-age=31536000; includeSubDomains"
+
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Add security headers to response."""
         response = await call_next(request)
@@ -267,13 +275,11 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         response.headers["X-XSS-Protection"] = "1; mode=block"
         response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
 
-        # Content Security Policy (adjust as needed)
-        if not settings.is_development:
-            response.headers["Content-Security-Policy"] = "default-src 'self'"
+        if self._csp_header:
+            response.headers["Content-Security-Policy"] = self._csp_header
 
-        # Strict Transport Security (HTTPS only)
-        if not settings.is_development:
-            response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        if self._hsts_header:
+            response.headers["Strict-Transport-Security"] = self._hsts_header
 
         return response
 
@@ -303,11 +309,21 @@ class CustomCORSMiddleware(BaseHTTPMiddleware):
         self.allow_methods = allow_methods or ["*"]
         self.allow_headers = allow_headers or ["*"]
         self.max_age = max_age
+        # Header values are fixed for the lifetime of the app, build them once
+        self._origin_is_wildcard = "*" in self.allow_origins
+        self._origins_set = frozenset(self.allow_origins)
+        self._methods_header = ", ".join(self.allow_methods)
+        self._headers_header = ", ".join(self.allow_headers)
+        self._max_age_str = str(max_age)
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Handle CORS preflight and add CORS headers."""
         origin = request.headers.get("origin")
 
+        # Same-origin and server-to-server requests carry no Origin: nothing to do
+        if not origin:
+            return await call_next(request)
+
         # Handle preflight request
         if request.method == "OPTIONS":
             response = Response(status_code=200)
@@ -315,16 +331,16 @@ class CustomCORSMiddleware(BaseHTTPMiddleware):
             response = await call_next(request)
 
         # Add CORS headers
-        if origin and ("*" in self.allow_origins or origin in self.allow_origins):
+        if self._origin_is_wildcard or origin in self._origins_set:
             response.headers["Access-Control-Allow-Origin"] = origin
 
             if self.allow_credentials:
                 response.headers["Access-Control-Allow-Credentials"] = "true"
 
             if request.method == "OPTIONS":
-                response.headers["Access-Control-Allow-Methods"] = ", ".join(self.allow_methods)
-                response.headers["Access-Control-Allow-Headers"] = ", ".join(self.allow_headers)
-                response.headers["Access-Control-Max-Age"] = str(self.max_age)
+                response.headers["Access-Control-Allow-Methods"] = self._methods_header
+                response.headers["Access-Control-Allow-Headers"] = self._headers_header
+                response.headers["Access-Control-Max-Age"] = self._max_age_str
 
         return response
 
@@ -339,6 +355,10 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
     Prevents sensitive error details from leaking.
     """
 
+    def __init__(self, app: ASGIApp):
+        super().__init__(app)
+        self._is_dev = settings.is_development
+
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Catch and handle errors."""
         try:
@@ -347,20 +367,14 @@ class ErrorHandlingMiddleware(BaseHTTPMiddleware):
             request_id = getattr(request.state, "request_id", "unknown")
 
             logger.exception(
-                f"Unhandled exception in middleware",
-                extra={
-                    "request_id": request_id,
-                    "error": str(e),
-                    "path": request.url.path,
-                }
+                "Unhandled exception in middleware request_id=%s path=%s: %s",
+                request_id, request.url.path, e
             )
 
-            from fastapi.responses import JSONResponse
-
             # Don't leak error details in production
-            error_detail = str(e) if settings.is_development else "An internal server error occurred"
+            error_detail = str(e) if self._is_dev else "An internal server error occurred"
 
-            return JSONResponse(
+            return DefaultJSONResponse(
                 status_code=500,
                 content={
                     "error": {
@@ -391,6 +405,7 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
         super().__init__(app)
         self.default_max_age = default_max_age
         self.cache_static = cache_static
+        self._default_cache = f"max-age={default_max_age}, must-revalidate"
 
     async def dispatch(self, request: Request, call_next: Callable) -> Response:
         """Add cache control headers."""
@@ -398,10 +413,10 @@ class CacheControlMiddleware(BaseHTTPMiddleware):
 
         # Don't cache by default (for API responses)
         if "Cache-Control" not in response.headers:
-            response.headers["Cache-Control"] = f"max-age={self.default_max_age}, must-revalidate"
+            response.headers["Cache-Control"] = self._default_cache
 
         # Cache static files longer
-        if self.cache_static and request.url.path.startswith("/static"):
+        if self.cache_static and request.scope["path"].startswith("/static"):
             response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
 
         return response
\ No newline at end of file
@@ -6,7 +6,7 @@ from sqlalchemy import text
 from app.api.dependencies import get_session_manager
 from app.services.session_manager2 import SessionManager
 from app.services.ingest import create_data_frame
-from app.db.connector import connect_db
+from app.db.connector import connect_db, discard_engine
 from app.models.db_config import DBConfigBase, DBConfig
 from app.models.response_data import DataResponses
 from app.models.types import DBType
@@ -17,8 +17,8 @@ router = APIRouter()
 async def test_connection(db_config: DBConfigBase = Body(...)):
     """Test database connection."""
     try:
-        connection = await connect_db(db_config=db_config)
-        with connection as conn:
+        engine = await connect_db(db_config=db_config)
+        with engine.connect() as conn:
             query = text("SELECT 1 FROM dual" if db_config.db_type == DBType.ORACLE else "SELECT 1")
             conn.execute(query)
         return {
@@ -26,8 +26,11 @@ async def test_connection(db_config: DBConfigBase = Body(...)):
             "success": True
         }
     except Exception as e:
+        # Do not keep a pool around for a config that cannot connect (e.g. a wrong password)
+        discard_engine(db_config)
         raise HTTPException(status_code=500, detail=f"Connection test failed: {str(e)}")
 
+
 @router.post("/upload_sql_data")
 async def upload_sql_data(
     db_config: DBConfig = Body(...),
@@ -54,9 +57,29 @@ async def upload_sql_data(
                 message=f"Loaded {len(table_data)} tables",
                 total_tables=len(table_data),
                 data_tables=table_data
-            )
+            ).model_dump()
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to upload database data: {str(e)}")
+
+
+@router.post("/preview_sql_data")
+async def preview_sql_data(db_config: DBConfig = Body(...)):
+    """Preview the first rows of each table without loading them fully or creating a session."""
+    try:
+        table_data, _ = await create_data_frame(db_config=db_config, preview_only=True)
+        return {
+            "data_responses": DataResponses(
+                db_type=db_config.db_type,
+                database=db_config.db,
+                message=f"Previewed {len(table_data)} tables",
+                total_tables=len(table_data),
+                data_tables=table_data
+            ).model_dump()
         }
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to upload database data: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to preview database data: {str(e)}")
@@ -1,14 +1,16 @@
 """File upload and management endpoints."""
+import asyncio
 import hashlib
 import logging
-from typing import List
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO, List, Optional
 from fastapi import APIRouter, HTTPException, UploadFile, File, status, Depends
 
 from app.core.config import settings
 from app.core.exceptions import InvalidFileFormatError, FileTooLargeError, DataIngestionError
 from app.core.security import check_file_extension, sanitize_filename
 # from app.api.dependencies import SessionManagerDep
-from app.api.dependencies import get_session_manager
+from app.api.dependencies import get_session_manager, RateLimiter
 from app.services.session_manager2 import SessionManager
 from app.services.ingest import create_data_frame
 from app.models.response_data import DataResponses
@@ -16,7 +18,39 @@ from app.models.response_data import DataResponses
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-@router.post("/upload", status_code=status.HTTP_201_CREATED)
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read per iteration when validating uploads
+UPLOAD_SPOOL_SIZE = 10_000_000  # Validated uploads up to this size are kept in memory for parsing
+
+
+def _scan_upload(
+        stream: BinaryIO,
+        hasher: Optional["hashlib._Hash"],
+        max_size: int,
+        sink: Optional[BinaryIO] = None
+) -> int:
+    """
+    Read an upload stream chunk by chunk, feeding the hasher and copying into sink if given.
+
+    Stops as soon as max_size is exceeded, so the returned size is only
+    exact when it is within the limit. Blocking: run it in a worker thread.
+    """
+    size = 0
+    while chunk := stream.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_size:
+            break
+        if hasher is not None:
+            hasher.update(chunk)
+        if sink is not None:
+            sink.write(chunk)
+    return size
+
+
+@router.post(
+    "/upload",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(RateLimiter(times=5, seconds=1))]
+)
 async def upload_files(
         files: List[UploadFile] = File(..., description="Files to upload (CSV, Excel, etc.)"),
         session_manager: SessionManager = Depends(get_session_manager),
@@ -40,7 +74,8 @@ async def upload_files(
         )
 
     # Validate files
-    for file in files:
+    session_hash = hashlib.md5()
+    for index, file in enumerate(files):
         # Sanitize filename
         original_filename = file.filename
         file.filename = sanitize_filename(file.filename)
@@ -52,22 +87,48 @@ async def upload_files(
         if not check_file_extension(file.filename):
             raise InvalidFileFormatError(
                 filename=file.filename,
-                expected_formats=settings.allowed_extensions
+                expected_formats=settings.allowed_extensions_list
+            )
+
+        # Reject early when the size of the part is already known; a malformed
+        # header is ignored, the streamed scan below still enforces the limit
+        declared_size = file.size
+        if declared_size is None:
+            content_length = file.headers.get("content-length", "")
+            declared_size = int(content_length) if content_length.isdigit() else 0
+        if declared_size > settings.max_upload_size:
+            raise FileTooLargeError(
+                filename=file.filename,
+                size=declared_size,
+                max_size=settings.max_upload_size
             )
 
-        # Check size (read content to verify)
-        content = await file.read()
-        if len(content) > settings.max_upload_size:
+        # Check size by streaming the upload, session ID is hashed from the first file on the way.
+        # The same pass copies the bytes into a spool that stays in memory for small files,
+        # so parsing does not read them back from Starlette's on-disk temp file.
+        # Reading and hashing run in a worker thread to keep the event loop free.
+        spool = SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+        size = await asyncio.to_thread(
+            _scan_upload,
+            file.file,
+            session_hash if index == 0 else None,
+            settings.max_upload_size,
+            spool
+        )
+        if size > settings.max_upload_size:
+            spool.close()
             raise FileTooLargeError(
                 filename=file.filename,
-                size=len(content),
+                size=size,
                 max_size=settings.max_upload_size
             )
 
-        # Reset file pointer
-        await file.seek(0)
+        # Swap in the spooled copy, rewound for parsing
+        spool.seek(0)
+        await file.close()
+        file.file = spool
 
-        logger.info(f"File validated: {file.filename} ({len(content)} bytes)")
+        logger.info(f"File validated: {file.filename} ({size} bytes)")
 
     try:
         # Process files
@@ -75,9 +136,8 @@ async def upload_files(
         table_data, dataframes = await create_data_frame(files=files)
         logger.info(f"Created {len(dataframes)} dataframe(s)")
 
-        # Generate session ID from first file content
-        first_file_content = await files[0].read()
-        session_id = hashlib.md5(first_file_content).hexdigest()
+        # Session ID computed from first file content during validation (32 hex chars, same length as before)
+        session_id = session_hash.hexdigest()
         logger.info(f"Generated session ID: {session_id}")
 
         # Store in session manager
@@ -96,7 +156,7 @@ async def upload_files(
                 message=f"Successfully uploaded {len(files)} file(s)",
                 total_tables=len(table_data),
                 data_tables=table_data
-            )
+            ).model_dump()
         }
 
     except Exception as e:
@@ -114,7 +174,7 @@ async def get_supported_formats():
     Returns information about file upload limits and supported formats.
     """
     return {
-        "supported_formats": settings.allowed_extensions,
+        "supported_formats": settings.allowed_extensions_list,
         "max_file_size_bytes": settings.max_upload_size,
         "max_file_size_mb": settings.max_upload_size / (1024 * 1024),
         "examples": {
@@ -140,7 +200,7 @@ async def validate_file_format(filename: str):
     is_valid = check_file_extension(filename)
 
     if is_valid:
-        extension = filename.rsplit('.', 1)[1].lower()
+        extension = filename.rpartition('.')[2].lower()
         return {
             "valid": True,
             "filename": filename,
@@ -148,11 +208,11 @@ async def validate_file_format(filename: str):
             "message": f"File format '{extension}' is supported"
         }
     else:
-        extension = filename.rsplit('.', 1)[1].lower() if '.' in filename else "unknown"
+        extension = filename.rpartition('.')[2].lower() if '.' in filename else "unknown"
         return {
             "valid": False,
             "filename": filename,
             "extension": extension,
             "message": f"File format '{extension}' is not supported",
-            "supported_formats": settings.allowed_extensions
+            "supported_formats": settings.allowed_extensions_list
         }
\ No newline at end of file
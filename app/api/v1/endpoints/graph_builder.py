@@ -2,21 +2,22 @@
 from typing import List
 from fastapi import APIRouter, HTTPException, Body, Depends
 
-from app.core.config import settings
-from app.api.dependencies import get_session_manager
+from app.api.dependencies import get_session_manager, get_graph_builder, RateLimiter
+from app.services import cache
 from app.services.session_manager2 import SessionManager
-from app.services.neo4j.graph_api import create_graph_api
+from app.services.neo4j.graph_api import iter_graph_batches
 from app.services.neo4j.database import Neo4jGraphCreation
 from app.models.graph_config import GraphConfig
 
 router = APIRouter()
 
-@router.post("/create_graph_data/{session_id}")
+@router.post("/create_graph_data/{session_id}", dependencies=[Depends(RateLimiter(times=5, seconds=1))])
 async def create_graph_data(
         session_id: str,
         graph_config_list: List[GraphConfig] = Body(...),
         limit: int | None = None,
         session_manager: SessionManager = Depends(get_session_manager),
+        graph_builder: Neo4jGraphCreation = Depends(get_graph_builder),
 ):
     """Create graph data in Neo4j from session data."""
     try:
@@ -31,26 +32,19 @@ async def create_graph_data(
         if not graph_config_list or len(graph_config_list) == 0:
             raise HTTPException(status_code=400, detail="Graph configuration list is empty")
 
-        graph_api = await create_graph_api(
+        # Blocs are built batch by batch (up to limit, if specified) and written
+        # while the next batches are still being built
+        batches = iter_graph_batches(
             graph_config_list=graph_config_list,
-            data_dico=dataframes
+            data_dico=dataframes,
+            batch_size=1000,
+            limit=limit or None
         )
+        node_labels = {cfg.source.label for cfg in graph_config_list} | {cfg.target.label for cfg in graph_config_list}
 
-        graph_builder = Neo4jGraphCreation(
-            uri=settings.neo4j_uri,
-            user=settings.neo4j_username,
-            password=settings.neo4j_password,
-            database=settings.neo4j_database
-        )
-
-        # Apply limit if specified
-        graph_api_to_process = graph_api[:limit] if limit else graph_api
-
-        result = await graph_builder.create_graph_data(
-            graph_config_list=graph_api_to_process,
-            batch_size=1000
-        )
-        await graph_builder.close()
+        result = await graph_builder.create_graph_stream(batches, node_labels=node_labels)
+        # The graph changed: cached stats and /query results are stale
+        cache.clear()
 
         return {"success": True, "response": result}
     except HTTPException:
@@ -84,35 +78,31 @@ async def validate_graph_config(graph_config: List[GraphConfig] = Body(...)):
 
 
 @router.post("/check_neo4j_db")
-async def check_neo4j_db():
+async def check_neo4j_db(graph_builder: Neo4jGraphCreation = Depends(get_graph_builder)):
     """Check Neo4j database statistics."""
     try:
+        # Each sub-query aggregates on its own, so nodes and relationships are scanned
+        # once each instead of being expanded against each other
         query_str = """
-            MATCH (n)
-            WITH COUNT(n) as nodes, labels(n) as label_list
-            WITH nodes, COLLECT(DISTINCT label_list[0]) as labels
-            MATCH ()-[r]->()
-            WITH nodes, labels, COUNT(r) as relationships, type(r) as rel_type
-            WITH nodes, labels, relationships, COLLECT(DISTINCT rel_type) as relationship_types
+            CALL {
+                MATCH (n)
+                RETURN count(n) AS nodes, collect(DISTINCT labels(n)[0]) AS node_labels
+            }
+            CALL {
+                MATCH ()-[r]->()
+                RETURN count(r) AS relationships, collect(DISTINCT type(r)) AS relationship_types
+            }
             RETURN {
                 nodes: nodes,
                 relationships: relationships,
-                node_labels: labels,
+                node_labels: node_labels,
                 relationship_types: relationship_types,
-                node_label_count: size(labels),
+                node_label_count: size(node_labels),
                 relationship_type_count: size(relationship_types)
-            } as stats
+            } AS stats
         """
 
-        graph_builder = Neo4jGraphCreation(
-            uri=settings.neo4j_uri,
-            user=settings.neo4j_username,
-            password=settings.neo4j_password,
-            database=settings.neo4j_database
-        )
-
         graph_stats = await graph_builder.execute_query(query=query_str)
-        await graph_builder.close()
         return {"success": True, "stats": graph_stats}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Neo4j connection error: {str(e)}")
\ No newline at end of file
@@ -1,31 +1,69 @@
 """Health check endpoints."""
-from fastapi import APIRouter, Depends
+import asyncio
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import APIRouter, Depends, Response
 from app.core.config import settings
 # from app.api.dependencies import SessionManagerDep
 from app.api.dependencies import get_session_manager
 from app.services.session_manager2 import SessionManager
+from app.utils.serialization import dumps
 
 router = APIRouter()
 
+# Quick health payload never changes, serialize it once
+_HEALTH_BYTES = dumps({
+    "status": "healthy",
+    "service": settings.app_name,
+    "version": "0.1.0",
+})
+
+# Detailed health result shared between probes: (expiry_monotonic, payload)
+_detailed_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+_detailed_cache_lock = asyncio.Lock()
+
+
 @router.get("")
 async def health_check():
     """
     Quick health check.
     Returns service status.
     """
-    return {
-        "status": "healthy",
-        "service": settings.app_name,
-        "version": "0.1.0",
-    }
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 @router.get("/detailed")
-async def detailed_health_check(session_manager: SessionManager = Depends(get_session_manager)):
+async def detailed_health_check(
+        response: Response,
+        fresh: bool = False,
+        session_manager: SessionManager = Depends(get_session_manager),
+):
     """
     Detailed health check with component status.
     Checks all dependencies.
+
+    The result is reused for `health_cache_ttl` seconds so frequent probes
+    do not hit Neo4j every time. Pass `fresh=true` to force a new check.
     """
+    global _detailed_cache
+
+    ttl = settings.health_cache_ttl
+    if ttl > 0:
+        response.headers["Cache-Control"] = f"max-age={ttl}"
+
+    async with _detailed_cache_lock:
+        if not fresh and _detailed_cache is not None and _detailed_cache[0] > time.monotonic():
+            return _detailed_cache[1]
+
+        health_status = await _check_components(session_manager)
+        if ttl > 0:
+            _detailed_cache = (time.monotonic() + ttl, health_status)
+        return health_status
+
+
+async def _check_components(session_manager: SessionManager) -> Dict[str, Any]:
+    """Run the component checks behind the detailed health endpoint."""
     health_status = {
         "status": "healthy",
         "service": settings.app_name,
@@ -36,10 +74,10 @@ async def detailed_health_check(session_manager: SessionManager = Depends(get_se
 
     # Check session manager
     try:
-        sessions = session_manager.list_sessions()
+        # In-memory count only, listing would scan and unpickle the cache directory
         health_status["components"]["session_manager"] = {
             "status": "healthy",
-            "active_sessions": len(sessions)
+            "active_sessions": session_manager.count_sessions()
         }
     except Exception as e:
         health_status["components"]["session_manager"] = {
@@ -51,9 +89,15 @@ async def detailed_health_check(session_manager: SessionManager = Depends(get_se
     # Check Neo4j connection
     try:
         from app.services.neo4j.singleton import neo4j_driver
-        driver = await neo4j_driver.get_driver()
-        driver._driver.verify_connectivity()
+        driver = await asyncio.wait_for(neo4j_driver.get_driver(), timeout=settings.health_probe_timeout)
+        await asyncio.wait_for(driver._driver.verify_connectivity(), timeout=settings.health_probe_timeout)
         health_status["components"]["neo4j"] = {"status": "healthy"}
+    except asyncio.TimeoutError:
+        health_status["components"]["neo4j"] = {
+            "status": "unhealthy",
+            "error": f"No response within {settings.health_probe_timeout}s"
+        }
+        health_status["status"] = "degraded"
     except Exception as e:
         health_status["components"]["neo4j"] = {
             "status": "unhealthy",
@@ -1,10 +1,20 @@
 """
 Neo4j database inspection and management endpoints.
 """
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, HTTPException, status
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, HTTPException, Response, status
+from fastapi.responses import StreamingResponse
+from neo4j import READ_ACCESS, AsyncDriver, Record
 
+from app.api.dependencies import Neo4jSessionDep
 from app.core.config import settings
+from app.models.query import QueryRequest
+from app.services import cache
+from app.utils.serialization import dumps
+from app.utils.validators import count_cypher_literals, is_cypher_nondeterministic, is_cypher_write
 from app.services.neo4j.singleton import neo4j_driver
 
 router = APIRouter()
@@ -14,27 +24,33 @@ logger = logging.getLogger(__name__)
 async def get_neo4j_status():
     """
     Get Neo4j connection status.
+    Served from the background connectivity probe; `age_s` is the age of that result.
     
     Returns:
         Connection status and database information
     """
     try:
-        driver = await neo4j_driver.get_driver()
-        
-        if not driver.is_initialized():
-            return {
-                "status": "disconnected",
-                "message": "Neo4j driver not initialized"
-            }
-        
-        # Verify connectivity
-        is_connected = await driver.verify_connection()
+        is_connected, age = neo4j_driver.last_probe()
+
+        if age is None:
+            # No probe has completed yet, check once directly
+            driver = await neo4j_driver.get_driver()
+
+            if not driver.is_initialized():
+                return {
+                    "status": "disconnected",
+                    "message": "Neo4j driver not initialized"
+                }
+
+            is_connected = await driver.verify_connection()
+            age = 0.0
         
         return {
             "status": "connected" if is_connected else "disconnected",
             "uri": settings.neo4j_uri,
             "database": settings.neo4j_database,
-            "connected": is_connected
+            "connected": is_connected,
+            "age_s": round(age, 2)
         }
         
     except Exception as e:
@@ -45,74 +61,78 @@ async def get_neo4j_status():
         )
 
 
+# Each stats query groups its own scan and sums the total from the groups
+NODE_STATS_QUERY = """
+MATCH (n)
+WITH coalesce(labels(n)[0], 'Unknown') AS label, count(*) AS count
+ORDER BY count DESC
+WITH collect({label: label, count: count}) AS groups
+RETURN groups, reduce(total = 0, x IN groups | total + x.count) AS total
+"""
+
+REL_STATS_QUERY = """
+MATCH ()-[r]->()
+WITH type(r) AS type, count(*) AS count
+ORDER BY count DESC
+WITH collect({type: type, count: count}) AS groups
+RETURN groups, reduce(total = 0, x IN groups | total + x.count) AS total
+"""
+
+
+async def _run_single(async_driver: AsyncDriver, query: str) -> Optional[Record]:
+    """Run a query on its own session from the pool and return its single record."""
+    async with async_driver.session(
+        database=settings.neo4j_database,
+        fetch_size=settings.neo4j_fetch_size,
+        default_access_mode=READ_ACCESS,
+    ) as session:
+        result = await session.run(query)
+        return await result.single()
+
+
+async def _compute_stats() -> Dict[str, Any]:
+    """Scan the graph for node and relationship counts."""
+    driver = await neo4j_driver.get_driver()
+
+    if not driver.is_initialized():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Neo4j driver not initialized"
+        )
+
+    # Node and relationship scans are independent: run them on two pooled
+    # sessions at once so the wall time is the slower scan, not the sum of both
+    node_record, rel_record = await asyncio.gather(
+        _run_single(driver._driver, NODE_STATS_QUERY),
+        _run_single(driver._driver, REL_STATS_QUERY),
+    )
+
+    return {
+        "total_nodes": node_record["total"] if node_record else 0,
+        "total_relationships": rel_record["total"] if rel_record else 0,
+        "node_labels": node_record["groups"] if node_record else [],
+        "relationship_types": rel_record["groups"] if rel_record else []
+    }
+
+
 @router.get("/stats")
-async def get_neo4j_stats():
+async def get_neo4j_stats(response: Response):
     """
     Get Neo4j database statistics.
+    Results are cached for `stats_cache_ttl` seconds and invalidated by graph writes.
     
     Returns:
         Database statistics including node and relationship counts
     """
     try:
-        driver = await neo4j_driver.get_driver()
-        
-        if not driver.is_initialized():
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Neo4j driver not initialized"
-            )
-        
-        async_driver = driver._driver
-        async with async_driver.session(database=settings.neo4j_database) as session:
-            # Get node statistics
-            node_query = """
-            MATCH (n)
-            RETURN labels(n) as labels, count(n) as count
-            ORDER BY count DESC
-            """
-            
-            # Get relationship statistics
-            rel_query = """
-            MATCH ()-[r]->()
-            RETURN type(r) as type, count(r) as count
-            ORDER BY count DESC
-            """
-            
-            # Get total counts
-            total_query = """
-            MATCH (n)
-            WITH count(n) as node_count
-            MATCH ()-[r]->()
-            WITH node_count, count(r) as rel_count
-            RETURN node_count, rel_count
-            """
-            
-            result = await session.run(total_query)
-            record = await result.single()
-            
-            node_result = await session.run(node_query)
-            node_records = []
-            async for r in node_result:
-                node_records.append(r.data())
-            
-            rel_result = await session.run(rel_query)
-            rel_records = []
-            async for r in rel_result:
-                rel_records.append(r.data())
-            
-            return {
-                "total_nodes": record["node_count"] if record else 0,
-                "total_relationships": record["rel_count"] if record else 0,
-                "node_labels": [
-                    {"label": r["labels"][0] if r["labels"] else "Unknown", "count": r["count"]}
-                    for r in node_records
-                ],
-                "relationship_types": [
-                    {"type": r["type"], "count": r["count"]}
-                    for r in rel_records
-                ]
-            }
-            
+        stats, hit = await cache.get_or_set(
+            cache.neo4j_stats_key(),
+            ttl=settings.stats_cache_ttl,
+            loader=_compute_stats
+        )
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
+        return stats
+
     except Exception as e:
         logger.error(f"Error getting Neo4j stats: {e}")
         raise HTTPException(
@@ -121,38 +141,78 @@ async def get_neo4j_stats():
         )
 
 
+@router.post("/stats/invalidate")
+async def invalidate_neo4j_stats():
+    """
+    Drop the cached Neo4j statistics so the next call rescans the graph.
+    """
+    return {"success": True, "invalidated": cache.invalidate(cache.neo4j_stats_key())}
+
+
+def _check_literals(query: str):
+    """Reject queries with too many inline literals: each distinct value forces Neo4j to plan the query again."""
+    literal_count = count_cypher_literals(query)
+    if literal_count > settings.cypher_max_literals:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"Query contains {literal_count} inline literals (max {settings.cypher_max_literals}). "
+                "Pass values as $name placeholders in 'parameters' instead."
+            )
+        )
+
+
 @router.post("/query")
-async def execute_cypher_query(query: str):
+async def execute_cypher_query(
+        session: Neo4jSessionDep,
+        body: Optional[QueryRequest] = None,
+        query: Optional[str] = None
+):
     """
     Execute a custom Cypher query.
+
+    Values should be sent as `$name` placeholders with a `parameters` map
+    rather than inlined literals, so Neo4j plans each query shape only once.
     
     Args:
-        query: Cypher query string
+        body: Cypher query string and its parameters
+        query: Cypher query string as a query parameter, kept for older clients;
+            used only when no body is sent
         
     Returns:
         Query results
     """
-    try:
-        driver = await neo4j_driver.get_driver()
-        
-        if not driver.is_initialized():
+    if body is None:
+        if not query or not query.strip():
             raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Neo4j driver not initialized"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="A Cypher query is required, as a JSON body or a 'query' parameter."
             )
+        body = QueryRequest(query=query)
+    _check_literals(body.query)
+
+    async def run_query() -> List[Dict[str, Any]]:
+        result = await session.run(body.query, body.parameters)
+        # Materialize all rows in one driver call; data() still converts nodes/relationships to dicts
+        return await result.data()
+
+    try:
+        if is_cypher_write(body.query):
+            records = await run_query()
+            # The graph changed: cached stats and query results are stale
+            cache.clear()
+        elif is_cypher_nondeterministic(body.query):
+            # rand(), timestamp(), datetime()...: a cached result would be wrong on the next call
+            records = await run_query()
+        else:
+            key = ("cypher", body.query, json.dumps(body.parameters, sort_keys=True, default=str))
+            records, _ = await cache.get_or_set(key, ttl=settings.query_cache_ttl, loader=run_query)
         
-        async_driver = driver._driver
-        async with async_driver.session(database=settings.neo4j_database) as session:
-            result = await session.run(query)
-            records = []
-            async for r in result:
-                records.append(r.data())
-            
-            return {
-                "success": True,
-                "results": records,
-                "count": len(records)
-            }
+        return {
+            "success": True,
+            "results": records,
+            "count": len(records)
+        }
             
     except Exception as e:
         logger.error(f"Error executing Cypher query: {e}")
@@ -161,3 +221,33 @@ async def execute_cypher_query(query: str):
             detail=f"Query execution failed: {str(e)}"
         )
 
+
+@router.post("/query/stream")
+async def stream_cypher_query(body: QueryRequest):
+    """
+    Execute a read-only Cypher query and stream its records as NDJSON, one per line.
+
+    Records are forwarded as Neo4j returns them instead of being collected
+    first, so large results start arriving at once and are never held whole
+    in memory. Results are not cached.
+
+    Args:
+        body: Cypher query string and its parameters
+
+    Returns:
+        application/x-ndjson stream of records
+    """
+    _check_literals(body.query)
+    if is_cypher_write(body.query):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only read queries can be streamed; use /query for writes."
+        )
+
+    # The generator opens its own session: request-scoped dependencies are
+    # closed before a streaming body is sent
+    async def ndjson_lines():
+        async for record in neo4j_driver.stream_query(body.query, body.parameters, read_only=True):
+            yield dumps(record) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type="application/x-ndjson")
@@ -1,18 +1,25 @@
 """Routes pour la gestion des sessions."""
+from itertools import islice
 from fastapi import APIRouter, HTTPException, Depends
-from app.api.dependencies import get_session_manager
+from app.api.dependencies import get_session_manager, PaginationDep
 from app.services.session_manager2 import SessionManager
 
 router = APIRouter()
 
 @router.get("/list")
-async def list_sessions(session_manager: SessionManager = Depends(get_session_manager)):
-    """List all active sessions."""
+async def list_sessions(
+    pagination: PaginationDep,
+    session_manager: SessionManager = Depends(get_session_manager)
+):
+    """List active sessions, paginated with skip/limit."""
     try:
         sessions = session_manager.list_sessions()
+        page = dict(islice(sessions.items(), pagination.skip, pagination.skip + pagination.limit))
         return {
-            "sessions": sessions,
-            "total_sessions": len(sessions)
+            "sessions": page,
+            "total_sessions": len(sessions),
+            "skip": pagination.skip,
+            "limit": pagination.limit
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list sessions: {str(e)}")
@@ -2,7 +2,7 @@
 Main API v1 router.
 Aggregates all endpoint routers and provides API-wide configuration.
 """
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 from app.api.v1.endpoints import (
     files,
     databases,
@@ -11,6 +11,7 @@ from app.api.v1.endpoints import (
     neo4j,
     health,
 )
+from app.utils.serialization import dumps
 
 # Create main API router
 api_router = APIRouter()
@@ -101,6 +102,44 @@ api_router.include_router(
 # ============================================================================
 # API Root Endpoint
 # ============================================================================
+# The root payload is static: encode it once at import
+_API_ROOT_BYTES = dumps({
+    "version": "v1",
+    "description": "Graph Builder Service API",
+    "endpoints": {
+        "health": {
+            "path": "/api/v1/health",
+            "description": "Health check endpoints"
+        },
+        "files": {
+            "path": "/api/v1/files",
+            "description": "File upload and management"
+        },
+        "databases": {
+            "path": "/api/v1/databases",
+            "description": "Database connections and data import"
+        },
+        "sessions": {
+            "path": "/api/v1/sessions",
+            "description": "Data session management"
+        },
+        "graph_builder": {
+            "path": "/api/v1/graph_builder",
+            "description": "Neo4j graph creation"
+        },
+        "neo4j": {
+            "path": "/api/v1/neo4j",
+            "description": "Neo4j database inspection"
+        }
+    },
+    "documentation": {
+        "swagger": "/docs",
+        "redoc": "/redoc",
+        "openapi": "/openapi.json"
+    }
+})
+
+
 @api_router.get(
     "",
     tags=["Root"],
@@ -114,38 +153,8 @@ async def api_root():
     Returns:
         API metadata and available endpoint groups
     """
-    return {
-        "version": "v1",
-        "description": "Graph Builder Service API",
-        "endpoints": {
-            "health": {
-                "path": "/api/v1/health",
-                "description": "Health check endpoints"
-            },
-            "files": {
-                "path": "/api/v1/files",
-                "description": "File upload and management"
-            },
-            "databases": {
-                "path": "/api/v1/databases",
-                "description": "Database connections and data import"
-            },
-            "sessions": {
-                "path": "/api/v1/sessions",
-                "description": "Data session management"
-            },
-            "graph_builder": {
-                "path": "/api/v1/graph_builder",
-                "description": "Neo4j graph creation"
-            },
-            "neo4j": {
-                "path": "/api/v1/neo4j",
-                "description": "Neo4j database inspection"
-            }
-        },
-        "documentation": {
-            "swagger": "/docs",
-            "redoc": "/redoc",
-            "openapi": "/openapi.json"
-        }
-    }
\ No newline at end of file
+    return Response(
+        content=_API_ROOT_BYTES,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=300"}
+    )
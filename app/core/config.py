@@ -2,11 +2,37 @@
 Complete configuration management for Graph Builder Service.
 Uses Pydantic Settings for validation and environment variable loading.
 """
-from functools import lru_cache
-from typing import Any, List, Optional
+import warnings
+from functools import cached_property, lru_cache
+from typing import Annotated, Any, Dict, FrozenSet, List, Optional, Tuple
 from pathlib import Path
-from pydantic import Field, field_validator, computed_field
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from urllib.parse import quote
+from pydantic import Field, PrivateAttr, field_validator, computed_field
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
+
+# Placeholder credentials that must never be used in production
+INSECURE_DEFAULT_SECRET_KEY = "change-me-in-production"
+INSECURE_DEFAULT_API_KEY = "dev-api-key-change-in-production"
+
+# Normalized environment names (the environment validator lowercases the value)
+_DEV_ENVS = frozenset({"dev", "development"})
+_PROD_ENVS = frozenset({"prod", "production"})
+
+
+def quote_credential(value: str) -> str:
+    """Percent-encode a user name or password so @, / and : survive in a database URL."""
+    return quote(value, safe="")
+
+
+def _split_csv(value: str, lower: bool = False) -> Tuple[str, ...]:
+    """Split a comma-separated setting into its stripped, non-empty items."""
+    if not value:
+        return ()
+    parts = (part.strip() for part in value.split(","))
+    if lower:
+        return tuple(part.lower() for part in parts if part)
+    return tuple(part for part in parts if part)
+
 
 class Settings(BaseSettings):
     """
@@ -75,6 +101,13 @@ class Settings(BaseSettings):
         description="Auto-reload on code changes"
     )
 
+    gzip_compress_level: int = Field(
+        default=5,
+        ge=1,
+        le=9,
+        description="zlib level for gzip responses (Starlette defaults to 9)"
+    )
+
     # ========================================================================
     # Neo4j Configuration
     # ========================================================================
@@ -118,6 +151,27 @@ class Settings(BaseSettings):
         description="Connection timeout in seconds"
     )
 
+    neo4j_connection_acquisition_timeout: int = Field(
+        default=60,
+        ge=1,
+        le=600,
+        description="Seconds to wait for a free pooled connection before failing"
+    )
+
+    neo4j_fetch_size: int = Field(
+        default=1000,
+        ge=1,
+        le=100000,
+        description="Records pulled per Bolt PULL message by Neo4j sessions"
+    )
+
+    neo4j_probe_interval: int = Field(
+        default=10,
+        ge=1,
+        le=3600,
+        description="Seconds between background Neo4j connectivity probes"
+    )
+
     # ========================================================================
     # MySQL Configuration
     # ========================================================================
@@ -250,6 +304,44 @@ class Settings(BaseSettings):
         description="Oracle max overflow connections"
     )
 
+    # ========================================================================
+    # Health Checks
+    # ========================================================================
+    health_cache_ttl: int = Field(
+        default=15,
+        ge=0,
+        le=300,
+        description="Seconds the detailed health check result is reused (0 disables caching)"
+    )
+
+    stats_cache_ttl: int = Field(
+        default=30,
+        ge=0,
+        le=3600,
+        description="Seconds Neo4j statistics are cached (0 disables caching)"
+    )
+
+    query_cache_ttl: int = Field(
+        default=30,
+        ge=0,
+        le=3600,
+        description="Seconds results of read-only custom Cypher queries are cached (0 disables caching)"
+    )
+
+    cypher_max_literals: int = Field(
+        default=10,
+        ge=0,
+        le=1000,
+        description="Max inline literals accepted in a custom Cypher query, use $parameters beyond that"
+    )
+
+    health_probe_timeout: float = Field(
+        default=2.0,
+        gt=0,
+        le=60,
+        description="Timeout in seconds for each dependency probe of the detailed health check"
+    )
+
     # ========================================================================
     # Session Management
     # ========================================================================
@@ -265,6 +357,11 @@ class Settings(BaseSettings):
         description="Directory for session cache"
     )
 
+    shrink_session_dtypes: bool = Field(
+        default=False,
+        description="Store session columns as unsigned integers / categoricals where values allow"
+    )
+
     # ========================================================================
     # File Upload Settings
     # ========================================================================
@@ -275,8 +372,22 @@ class Settings(BaseSettings):
         description="Maximum upload file size in bytes"
     )
 
-    allowed_extensions: str = Field(
-        default="csv,tsv,dsv,xlsx,xls,json,parquet",
+    max_request_size: int = Field(
+        default=(20 * 104857600),  # 20 * 100MB = 2GB
+        ge=10240,  # 10KB minimum
+        description="Maximum total request body size in bytes, all uploaded files included"
+    )
+
+    max_parse_workers: int = Field(
+        default=2,
+        ge=1,
+        le=32,
+        description="Processes parsing Excel uploads, per application worker"
+    )
+
+    # Given as a comma-separated string, parsed into a frozenset by parse_allowed_extensions
+    allowed_extensions: Annotated[FrozenSet[str], NoDecode] = Field(
+        default=frozenset({"csv", "tsv", "dsv", "xlsx", "xls", "json", "parquet"}),
         description="Comma-separated list of allowed file extensions"
     )
 
@@ -344,6 +455,15 @@ class Settings(BaseSettings):
         description="Redis URL for distributed caching"
     )
 
+    # Environment flags, set once in model_post_init
+    _is_development: bool = PrivateAttr(default=False)
+    _is_production: bool = PrivateAttr(default=False)
+    _is_staging: bool = PrivateAttr(default=False)
+    # Cache directory, created once in model_post_init
+    _cache_path: Path = PrivateAttr(default=Path("cache_dir"))
+    # Connection URLs by database type, built once in model_post_init
+    _database_urls: Dict[str, str] = PrivateAttr(default_factory=dict)
+
     # ========================================================================
     # Validators
     # ========================================================================
@@ -368,44 +488,48 @@ class Settings(BaseSettings):
             raise ValueError(f"Invalid environment. Must be one of: {', '.join(valid_envs)}")
         return v_lower
 
-    @field_validator("allowed_extensions")
+    @field_validator("allowed_extensions", mode="before")
     @classmethod
-    def parse_allowed_extensions(cls, v: str) -> List[str]:
-        """Parse allowed extensions from comma-separated string."""
-        if not v:
-            return []
-        return [ext.strip().lower() for ext in v.split(",") if ext.strip()]
+    def parse_allowed_extensions(cls, v: Any) -> FrozenSet[str]:
+        """Parse allowed extensions from comma-separated string into a set for O(1) lookups."""
+        if isinstance(v, str):
+            v = _split_csv(v, lower=True)
+        return frozenset(str(ext).lower().lstrip(".") for ext in v)
 
     @field_validator("cors_origins")
     @classmethod
-    def parse_cors_origins(cls, v: str) -> List[str]:
+    def parse_cors_origins(cls, v: str) -> Tuple[str, ...]:
         """Parse CORS origins from comma-separated string."""
-        if v == "*":
-            return ["*"]
-        if not v:
-            return []
-        return [origin.strip() for origin in v.split(",") if origin.strip()]
+        return _split_csv(v)
 
     # ========================================================================
     # Computed Properties
+    # Settings are read-only once loaded, so derived values are built on
+    # first access and cached on the instance. Do not mutate them.
     # ========================================================================
 
-    @computed_field
+    @cached_property
+    def allowed_extensions_list(self) -> List[str]:
+        """Allowed extensions as a sorted list, for error messages and JSON responses."""
+        return sorted(self.allowed_extensions)
+
+    @property
     def is_development(self) -> bool:
         """Check if running in development mode."""
-        return str(self.environment).lower() in ["dev", "development"]
+        return self._is_development
 
-    @computed_field
+    @property
     def is_production(self) -> bool:
         """Check if running in production mode."""
-        return str(self.environment).lower() in ["prod", "production"]
+        return self._is_production
 
-    @computed_field
+    @property
     def is_staging(self) -> bool:
         """Check if running in staging mode."""
-        return str(self.environment).lower() == "staging"
+        return self._is_staging
 
     @computed_field
+    @cached_property
     def neo4j_config(self) -> dict:
         """Get Neo4j configuration as dictionary."""
         return {
@@ -416,9 +540,11 @@ class Settings(BaseSettings):
             "max_connection_lifetime": self.neo4j_max_connection_lifetime,
             "max_connection_pool_size": self.neo4j_max_connection_pool_size,
             "connection_timeout": self.neo4j_connection_timeout,
+            "connection_acquisition_timeout": self.neo4j_connection_acquisition_timeout,
         }
 
     @computed_field
+    @cached_property
     def mysql_config(self) -> dict:
         """Get MySQL configuration as dictionary."""
         return {
@@ -432,6 +558,7 @@ class Settings(BaseSettings):
         }
 
     @computed_field
+    @cached_property
     def postgres_config(self) -> dict:
         """Get PostgreSQL configuration as dictionary."""
         return {
@@ -445,6 +572,7 @@ class Settings(BaseSettings):
         }
 
     @computed_field
+    @cached_property
     def oracle_config(self) -> dict:
         """Get Oracle configuration as dictionary."""
         return {
@@ -457,12 +585,10 @@ class Settings(BaseSettings):
             "max_overflow": self.oracle_max_overflow,
         }
 
-    @computed_field
+    @property
     def cache_path(self) -> Path:
-        """Get cache directory as Path object."""
-        path = Path(self.cache_dir)
-        path.mkdir(parents=True, exist_ok=True)
-        return path
+        """Get cache directory as Path object (created once at startup)."""
+        return self._cache_path
 
     @computed_field
     def max_upload_size_mb(self) -> float:
@@ -479,44 +605,50 @@ class Settings(BaseSettings):
         Returns:
             Connection URL string
         """
-        if db_type.lower() == "mysql":
-            return (
-                f"mysql+pymysql://{self.mysql_user}:{self.mysql_password}"
-                f"@{self.mysql_host}:{self.mysql_port}/{self.mysql_database}"
-            )
-        elif db_type.lower() in ["postgres", "postgresql"]:
-            return (
-                f"postgresql+psycopg2://{self.postgres_user}:{self.postgres_password}"
-                f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_database}"
-            )
-        elif db_type.lower() == "oracle":
-            return (
-                f"oracle+cx_oracle://{self.oracle_user}:{self.oracle_password}"
-                f"@{self.oracle_host}:{self.oracle_port}/?service_name={self.oracle_service_name}"
-            )
-        else:
-            raise ValueError(f"Unsupported database type: {db_type}")
+        try:
+            return self._database_urls[db_type.lower()]
+        except KeyError:
+            raise ValueError(f"Unsupported database type: {db_type}") from None
 
     def model_post_init(self, __context: Any) -> None:  # pylint: disable=arguments-differ
         """Post-initialization validation."""
+        self._is_development = self.environment in _DEV_ENVS
+        self._is_production = self.environment in _PROD_ENVS
+        self._is_staging = self.environment == "staging"
+
+        self._cache_path = Path(self.cache_dir)
+        self._cache_path.mkdir(parents=True, exist_ok=True)
+
+        postgres_url = (
+            f"postgresql+psycopg2://{quote_credential(self.postgres_user)}:{quote_credential(self.postgres_password)}"
+            f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_database}"
+        )
+        self._database_urls = {
+            "mysql": (
+                f"mysql+pymysql://{quote_credential(self.mysql_user)}:{quote_credential(self.mysql_password)}"
+                f"@{self.mysql_host}:{self.mysql_port}/{self.mysql_database}"
+            ),
+            "postgres": postgres_url,
+            "postgresql": postgres_url,
+            "oracle": (
+                f"oracle+cx_oracle://{quote_credential(self.oracle_user)}:{quote_credential(self.oracle_password)}"
+                f"@{self.oracle_host}:{self.oracle_port}/?service_name={self.oracle_service_name}"
+            ),
+        }
+
         # Warn about insecure defaults in production
         if self.is_production:
-            if self.secret_key == "change-me-in-production":
-                import warnings
+            if self.secret_key == INSECURE_DEFAULT_SECRET_KEY:
                 warnings.warn(
                     "Using default SECRET_KEY in production! "
                     "Generate a secure key with: openssl rand -hex 32"
                 )
-
-            if self.api_key == "dev-api-key-change-in-production":
-                import warnings
+            if self.api_key == INSECURE_DEFAULT_API_KEY:
                 warnings.warn(
                     "Using default API_KEY in production! "
                     "Generate a secure key with: openssl rand -hex 32"
                 )
-
             if self.debug:
-                import warnings
                 warnings.warn("Debug mode is enabled in production!")
 
 
@@ -5,6 +5,9 @@ from typing import Any, Dict, Optional
 class GraphBuilderException(Exception):
     """Base exception for all application errors."""
 
+    # Attributes live in slots, so raising does not allocate an instance __dict__
+    __slots__ = ("message", "status_code", "details")
+
     def __init__(
             self,
             message: str,
@@ -20,6 +23,8 @@ class GraphBuilderException(Exception):
 class DatabaseConnectionError(GraphBuilderException):
     """Raised when database connection fails."""
 
+    __slots__ = ()
+
     def __init__(self, message: str = "Database connection failed", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status_code=503, details=details)
 
@@ -27,6 +32,8 @@ class DatabaseConnectionError(GraphBuilderException):
 class Neo4jConnectionError(GraphBuilderException):
     """Raised when Neo4j connection fails."""
 
+    __slots__ = ()
+
     def __init__(self, message: str = "Neo4j connection failed", details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status_code=503, details=details)
 
@@ -34,6 +41,8 @@ class Neo4jConnectionError(GraphBuilderException):
 class SessionNotFoundError(GraphBuilderException):
     """Raised when session is not found."""
 
+    __slots__ = ()
+
     def __init__(self, session_id: str):
         super().__init__(
             message=f"Session not found: {session_id}",
@@ -45,6 +54,8 @@ class SessionNotFoundError(GraphBuilderException):
 class SessionExpiredError(GraphBuilderException):
     """Raised when session has expired."""
 
+    __slots__ = ()
+
     def __init__(self, session_id: str):
         super().__init__(
             message=f"Session expired: {session_id}",
@@ -56,6 +67,8 @@ class SessionExpiredError(GraphBuilderException):
 class InvalidFileFormatError(GraphBuilderException):
     """Raised when file format is invalid."""
 
+    __slots__ = ()
+
     def __init__(self, filename: str, expected_formats: list):
         super().__init__(
             message=f"Invalid file format for {filename}. Expected: {', '.join(expected_formats)}",
@@ -67,6 +80,8 @@ class InvalidFileFormatError(GraphBuilderException):
 class FileTooLargeError(GraphBuilderException):
     """Raised when uploaded file is too large."""
 
+    __slots__ = ()
+
     def __init__(self, filename: str, size: int, max_size: int):
         super().__init__(
             message=f"File {filename} is too large ({size} bytes). Maximum size: {max_size} bytes",
@@ -78,6 +93,8 @@ class FileTooLargeError(GraphBuilderException):
 class GraphConfigurationError(GraphBuilderException):
     """Raised when graph configuration is invalid."""
 
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status_code=400, details=details)
 
@@ -85,6 +102,8 @@ class GraphConfigurationError(GraphBuilderException):
 class DataIngestionError(GraphBuilderException):
     """Raised when data ingestion fails."""
 
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status_code=500, details=details)
 
@@ -92,5 +111,7 @@ class DataIngestionError(GraphBuilderException):
 class GraphCreationError(GraphBuilderException):
     """Raised when graph creation fails."""
 
+    __slots__ = ()
+
     def __init__(self, message: str, details: Optional[Dict[str, Any]] = None):
         super().__init__(message, status_code=500, details=details)
\ No newline at end of file
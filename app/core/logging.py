@@ -2,27 +2,59 @@
 Complete logging configuration for Graph Builder Service.
 Provides structured logging with rotation, multiple handlers, and formatting.
 """
+import atexit
 import logging
 import sys
 from pathlib import Path
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
-from typing import Optional
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from queue import Full, Queue, SimpleQueue
+from types import SimpleNamespace
+from typing import Dict, Optional
 import json
-from datetime import datetime
+import time
+
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
 
 from app.core.config import settings
 
 
+# Standard LogRecord attributes, everything else on a record came from `extra`
+_STD_LOGRECORD_ATTRS = frozenset({
+    "name", "msg", "args", "created", "filename", "funcName",
+    "levelname", "lineno", "module", "msecs", "message", "pathname",
+    "process", "processName", "relativeCreated", "thread", "threadName",
+    "exc_info", "exc_text", "stack_info", "levelno", "taskName",
+    # Set on the record by text formatters that ran first
+    "asctime",
+})
+
+
 class JSONFormatter(logging.Formatter):
     """
     Custom JSON formatter for structured logging.
     Outputs logs in JSON format for easy parsing by log aggregators.
     """
 
+    # (whole second, formatted "YYYY-MM-DDTHH:MM:SS") of the last record, records come in bursts
+    _last_second = (-1, "")
+
+    def _timestamp(self, record: logging.LogRecord) -> str:
+        """UTC ISO-8601 timestamp with milliseconds, built from the record's creation time."""
+        second = int(record.created)
+        cached_second, prefix = self._last_second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            self._last_second = (second, prefix)
+        return "%s.%03dZ" % (prefix, record.msecs)
+
     def format(self, record: logging.LogRecord) -> str:
         """Format log record as JSON."""
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": self._timestamp(record),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -35,23 +67,15 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
 
-        # Add extra fields if present
-        if hasattr(record, "request_id"):
-            log_data["request_id"] = record.request_id
-
-        if hasattr(record, "user_id"):
-            log_data["user_id"] = record.user_id
-
-        # Add custom fields from extra parameter
-        for key, value in record.__dict__.items():
-            if key not in [
-                "name", "msg", "args", "created", "filename", "funcName",
-                "levelname", "lineno", "module", "msecs", "message", "pathname",
-                "process", "processName", "relativeCreated", "thread", "threadName",
-                "exc_info", "exc_text", "stack_info", "levelno"
-            ]:
-                log_data[key] = value
+        # Add custom fields from extra parameter (request_id, user_id, ...).
+        # The set difference runs in C; most records have no extras and skip the loop
+        if record.__dict__.keys() - _STD_LOGRECORD_ATTRS:
+            for key, value in record.__dict__.items():
+                if key not in _STD_LOGRECORD_ATTRS:
+                    log_data[key] = value
 
+        if USE_ORJSON:
+            return orjson.dumps(log_data, default=str).decode("utf-8")
         return json.dumps(log_data)
 
 
@@ -72,20 +96,133 @@ class ColoredFormatter(logging.Formatter):
     RESET = "\033[0m"
     BOLD = "\033[1m"
 
-    def format(self, record: logging.LogRecord) -> str:
-        """Format log record with colors."""
-        # Add color to level name
-        levelname = record.levelname
-        if levelname in self.COLORS:
-            record.levelname = (
-                f"{self.COLORS[levelname]}{self.BOLD}{levelname}{self.RESET}"
-            )
+    # Colorized level names, built once below the class
+    COLORED_LEVELNAMES: Dict[str, str] = {}
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        """Format log record with a colored level name, leaving the record untouched."""
+        colored = self.COLORED_LEVELNAMES.get(record.levelname)
+        if colored is None:
+            return super().formatMessage(record)
+
+        # Styles only read the record's attributes: format a view of them with the colored
+        # level name so other handlers sharing this record still see the plain one
+        values = record.__dict__.copy()
+        values["levelname"] = colored
+        return self._style.format(SimpleNamespace(**values))
+
+
+ColoredFormatter.COLORED_LEVELNAMES = {
+    levelname: f"{color}{ColoredFormatter.BOLD}{levelname}{ColoredFormatter.RESET}"
+    for levelname, color in ColoredFormatter.COLORS.items()
+}
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that enqueues records as they are.
+    Formatting is left to the handlers on the listener thread, which keeps
+    exception info intact for formatters such as JSONFormatter.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Defer formatting to the listener thread."""
+        return record
+
+
+class DroppingQueueHandler(DeferredQueueHandler):
+    """
+    Queue handler that never blocks the caller.
+    Records are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, queue: Queue):
+        super().__init__(queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Enqueue without waiting; count the record as dropped if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+
+class _RootForwardingHandler(logging.Handler):
+    """Hand records over to the root logger handlers (runs on the listener thread)."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        logging.getLogger().handle(record)
+
+
+_queue_listeners: Dict[str, QueueListener] = {}
+
+
+def enable_queue_logging(logger: logging.Logger, maxsize: int = 10000) -> QueueListener:
+    """
+    Route a logger through a bounded in-memory queue.
+
+    The calling thread only enqueues the record; a background listener
+    thread emits it through the root logger handlers, so slow handlers
+    (files, streams) never block the event loop.
+
+    Args:
+        logger: Logger to decouple from its handlers
+        maxsize: Max number of pending records before new ones are dropped
+
+    Returns:
+        The running QueueListener
+    """
+    listener = _queue_listeners.get(logger.name)
+    if listener is not None:
+        return listener
+
+    log_queue: Queue = Queue(maxsize=maxsize)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    logger.propagate = False
 
-        # Format the message
-        formatted = super().format(record)
+    listener = QueueListener(log_queue, _RootForwardingHandler())
+    listener.start()
+    atexit.register(listener.stop)
+    _queue_listeners[logger.name] = listener
+    return listener
 
-        # Reset color at the end
-        return formatted
+
+# Log line formats
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+TEXT_FORMAT = "%(levelname)-8s | %(asctime)s | %(name)s:%(funcName)s:%(lineno)d | %(message)s"
+COLORED_FORMAT = "%(levelname)s | %(asctime)s | %(name)s:%(funcName)s:%(lineno)d | %(message)s"
+ERROR_FORMAT = TEXT_FORMAT + "\n%(pathname)s"
+
+
+# Levels applied to third-party loggers
+THIRD_PARTY_LOG_LEVELS = (
+    # Uvicorn
+    ("uvicorn", logging.INFO),
+    ("uvicorn.access", logging.WARNING),
+    ("uvicorn.error", logging.INFO),
+    # FastAPI
+    ("fastapi", logging.INFO),
+    # SQLAlchemy (reduce verbosity)
+    ("sqlalchemy.engine", logging.WARNING),
+    ("sqlalchemy.pool", logging.WARNING),
+    ("sqlalchemy.dialects", logging.WARNING),
+    # Neo4j
+    ("neo4j", logging.WARNING),
+    ("neo4j.io", logging.ERROR),
+    # Httpx (for async requests)
+    ("httpx", logging.WARNING),
+)
+
+
+def _make_file_handler(handler: logging.Handler, level: int, formatter: logging.Formatter) -> logging.Handler:
+    """Set level and formatter on a file handler."""
+    handler.setLevel(level)
+    handler.setFormatter(formatter)
+    return handler
+
+
+_logging_initialized = False
 
 
 def setup_logging(
@@ -102,14 +239,23 @@ def setup_logging(
         log_file: Enable file logging
         json_logs: Use JSON format for file logs
         colored_console: Use colored output for console
+
+    Only the first call configures logging, later calls are no-ops.
     """
+    global _logging_initialized
+    if _logging_initialized:
+        return
+    _logging_initialized = True
+
+    # Read environment once
+    is_dev = settings.is_development
+    env = settings.environment
+
     # Get log level from settings or parameter
     level_name = log_level or settings.log_level
     level = getattr(logging, level_name.upper())
 
-    # Create logs directory
     log_dir = Path("logs")
-    log_dir.mkdir(exist_ok=True)
 
     # Get root logger
     root_logger = logging.getLogger()
@@ -118,6 +264,9 @@ def setup_logging(
     # Remove existing handlers
     root_logger.handlers.clear()
 
+    # Plain text formatter shared by the console (when not colored) and file handlers
+    text_formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+
     # ========================================================================
     # Console Handler
     # ========================================================================
@@ -125,156 +274,84 @@ def setup_logging(
     console_handler.setLevel(level)
 
     if colored_console and sys.stdout.isatty():
-        console_format = (
-            "%(levelname)s | "
-            "%(asctime)s | "
-            "%(name)s:%(funcName)s:%(lineno)d | "
-            "%(message)s"
-        )
-        console_formatter = ColoredFormatter(
-            console_format,
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
+        console_formatter = ColoredFormatter(COLORED_FORMAT, datefmt=DATE_FORMAT)
     else:
-        console_format = (
-            "%(levelname)-8s | "
-            "%(asctime)s | "
-            "%(name)s:%(funcName)s:%(lineno)d | "
-            "%(message)s"
-        )
-        console_formatter = logging.Formatter(
-            console_format,
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
+        console_formatter = text_formatter
 
     console_handler.setFormatter(console_formatter)
     root_logger.addHandler(console_handler)
 
     # ========================================================================
-    # File Handler - General Logs
+    # File Handlers (general, errors, daily) - only created when file logging is on
     # ========================================================================
     if log_file:
-        if json_logs:
-            # JSON file handler
-            json_handler = RotatingFileHandler(
-                filename=log_dir / "app.json",
+        # Create logs directory
+        log_dir.mkdir(exist_ok=True)
+
+        # One formatter shared by the general and daily handlers
+        file_formatter = JSONFormatter() if json_logs else text_formatter
+
+        # General logs, rotated by size
+        file_handlers = [_make_file_handler(
+            RotatingFileHandler(
+                filename=log_dir / ("app.json" if json_logs else "app.log"),
                 maxBytes=10 * 1024 * 1024,  # 10MB
                 backupCount=10,
                 encoding="utf-8",
-            )
-            json_handler.setLevel(logging.DEBUG)
-            json_handler.setFormatter(JSONFormatter())
-            root_logger.addHandler(json_handler)
-        else:
-            # Regular file handler with rotation by size
-            file_handler = RotatingFileHandler(
-                filename=log_dir / "app.log",
+            ),
+            logging.DEBUG,
+            file_formatter
+        )]
+
+        # Error logs
+        file_handlers.append(_make_file_handler(
+            RotatingFileHandler(
+                filename=log_dir / "error.log",
                 maxBytes=10 * 1024 * 1024,  # 10MB
                 backupCount=10,
                 encoding="utf-8",
-            )
-            file_handler.setLevel(logging.DEBUG)
-            file_format = (
-                "%(levelname)-8s | "
-                "%(asctime)s | "
-                "%(name)s:%(funcName)s:%(lineno)d | "
-                "%(message)s"
-            )
-            file_formatter = logging.Formatter(
-                file_format,
-                datefmt="%Y-%m-%d %H:%M:%S"
-            )
-            file_handler.setFormatter(file_formatter)
-            root_logger.addHandler(file_handler)
+            ),
+            logging.ERROR,
+            logging.Formatter(ERROR_FORMAT, datefmt=DATE_FORMAT)
+        ))
+
+        # Daily rotating logs, skipped in development
+        if not is_dev:
+            file_handlers.append(_make_file_handler(
+                TimedRotatingFileHandler(
+                    filename=log_dir / "daily.log",
+                    when="midnight",
+                    interval=1,
+                    backupCount=30,  # Keep 30 days
+                    encoding="utf-8",
+                ),
+                logging.INFO,
+                file_formatter
+            ))
+
+        # Disk writes happen on a listener thread: logging calls only enqueue the record
+        log_queue: SimpleQueue = SimpleQueue()
+        file_listener = QueueListener(log_queue, *file_handlers, respect_handler_level=True)
+        file_listener.start()
+        atexit.register(file_listener.stop)
+        root_logger.addHandler(DeferredQueueHandler(log_queue))
 
-    # ========================================================================
-    # Error File Handler
-    # ========================================================================
-    if log_file:
-        error_handler = RotatingFileHandler(
-            filename=log_dir / "error.log",
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=10,
-            encoding="utf-8",
-        )
-        error_handler.setLevel(logging.ERROR)
-        error_format = (
-            "%(levelname)-8s | "
-            "%(asctime)s | "
-            "%(name)s:%(funcName)s:%(lineno)d | "
-            "%(message)s\n"
-            "%(pathname)s"
-        )
-        error_formatter = logging.Formatter(
-            error_format,
-            datefmt="%Y-%m-%d %H:%M:%S"
-        )
-        error_handler.setFormatter(error_formatter)
-        root_logger.addHandler(error_handler)
-
-    # ========================================================================
-    # Daily Rotating Handler (Optional)
-    # ========================================================================
-    if log_file and not settings.is_development:
-        daily_handler = TimedRotatingFileHandler(
-            filename=log_dir / "daily.log",
-            when="midnight",
-            interval=1,
-            backupCount=30,  # Keep 30 days
-            encoding="utf-8",
-        )
-        daily_handler.setLevel(logging.INFO)
-
-        # Choose formatter depending on JSON or not
-        if json_logs:
-            daily_formatter = JSONFormatter()
-        else:
-            daily_format = (
-                "%(levelname)-8s | "
-                "%(asctime)s | "
-                "%(name)s:%(funcName)s:%(lineno)d | "
-                "%(message)s"
-            )
-            daily_formatter = logging.Formatter(
-                daily_format,
-                datefmt="%Y-%m-%d %H:%M:%S"
-            )
-
-        daily_handler.setFormatter(daily_formatter)
-        root_logger.addHandler(daily_handler)
-     
     # ========================================================================
     # Configure Third-Party Loggers
     # ========================================================================
 
-    # Uvicorn
-    logging.getLogger("uvicorn").setLevel(logging.INFO)
-    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
-    logging.getLogger("uvicorn.error").setLevel(logging.INFO)
-
-    # FastAPI
-    logging.getLogger("fastapi").setLevel(logging.INFO)
-
-    # SQLAlchemy (reduce verbosity)
-    logging.getLogger("sqlalchemy.engine").setLevel(logging.WARNING)
-    logging.getLogger("sqlalchemy.pool").setLevel(logging.WARNING)
-    logging.getLogger("sqlalchemy.dialects").setLevel(logging.WARNING)
-
-    # Neo4j
-    logging.getLogger("neo4j").setLevel(logging.WARNING)
-    logging.getLogger("neo4j.io").setLevel(logging.ERROR)
-
-    # Httpx (for async requests)
-    logging.getLogger("httpx").setLevel(logging.WARNING)
+    for name, third_party_level in THIRD_PARTY_LOG_LEVELS:
+        logging.getLogger(name).setLevel(third_party_level)
 
     # Set DEBUG for our application in development
-    if settings.is_development:
+    if is_dev:
         logging.getLogger("app").setLevel(logging.DEBUG)
 
     # Log startup message
     root_logger.info(f"Logging initialized - Level: {level_name}")
-    root_logger.info(f"Environment: {settings.environment}")
-    root_logger.info(f"Log files: {log_dir.absolute()}")
+    root_logger.info(f"Environment: {env}")
+    if log_file:
+        root_logger.info(f"Log files: {log_dir.absolute()}")
 
 
 def get_logger(name: str) -> logging.Logger:
@@ -309,10 +386,3 @@ def log_exception(logger: logging.Logger, exc: Exception, context: Optional[dict
         extra=extra,
         exc_info=True
     )
-
-
-# Initialize logging on import
-setup_logging(
-    json_logs=settings.is_production,  # JSON logs in production
-    colored_console=settings.is_development  # Colors in development
-)
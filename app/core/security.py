@@ -5,8 +5,12 @@ Provides API key authentication, file validation, and security helpers.
 import secrets
 import hashlib
 import hmac
-from typing import Optional, List
-from datetime import datetime
+import re
+import time
+import blake3
+from functools import lru_cache
+from typing import AbstractSet, BinaryIO, FrozenSet, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
 from fastapi import Header, HTTPException, status, Request
 from fastapi.security import APIKeyHeader
 
@@ -18,6 +22,9 @@ from app.core.config import settings
 
 api_key_header = APIKeyHeader(name=settings.api_key_name, auto_error=False)
 
+# Encoded once; comparing bytes also accepts non-ASCII header values without raising
+_API_KEY_BYTES = settings.api_key.encode()
+
 def generate_api_key(length: int = 32) -> str:
     """
     Generate a secure random API key.
@@ -81,7 +88,7 @@ async def verify_api_key(
         )
 
     # Constant-time comparison to prevent timing attacks
-    if not secrets.compare_digest(api_key, settings.api_key):
+    if not secrets.compare_digest(api_key.encode(), _API_KEY_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
@@ -110,7 +117,7 @@ async def optional_api_key(
     if not api_key:
         return None
 
-    if not secrets.compare_digest(api_key, settings.api_key):
+    if not secrets.compare_digest(api_key.encode(), _API_KEY_BYTES):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid API key",
@@ -124,6 +131,12 @@ async def optional_api_key(
 # File Security
 # ============================================================================
 
+@lru_cache(maxsize=32)
+def _extension_set(allowed_extensions: Tuple[str, ...]) -> FrozenSet[str]:
+    """Normalize an explicit extension list once per distinct list."""
+    return frozenset(ext.lower().lstrip('.') for ext in allowed_extensions)
+
+
 def check_file_extension(
         filename: str,
         allowed_extensions: Optional[List[str]] = None
@@ -144,16 +157,19 @@ def check_file_extension(
         >>> check_file_extension("script.exe")
         False
     """
-    if allowed_extensions is None:
-        allowed_extensions = settings.allowed_extensions
+    if not filename:
+        return False
 
-    if not filename or '.' not in filename:
+    _, dot, extension = filename.rpartition('.')
+    if not dot:
         return False
 
-    extension = filename.rsplit('.', 1)[1].lower()
-    return extension in [ext.lower() for ext in allowed_extensions]
+    if allowed_extensions is None:
+        return extension.lower() in settings.allowed_extensions
+    return extension.lower() in _extension_set(tuple(allowed_extensions))
 
 
+@lru_cache(maxsize=1024)
 def get_file_extension(filename: str) -> Optional[str]:
     """
     Extract file extension from filename.
@@ -170,7 +186,13 @@ def get_file_extension(filename: str) -> Optional[str]:
     """
     if not filename or '.' not in filename:
         return None
-    return filename.rsplit('.', 1)[1].lower()
+    return filename.rpartition('.')[2].lower()
+
+
+# Control characters (null byte included) and characters unsafe in filenames
+_SANITIZE_TABLE = dict.fromkeys(range(32))
+_SANITIZE_TABLE.update(dict.fromkeys(map(ord, '<>:"|?*')))
+_UNSAFE_FILENAME_RE = re.compile(r'[\x00-\x1f<>:"|?*]')
 
 
 def sanitize_filename(filename: str, max_length: int = 255) -> str:
@@ -199,17 +221,13 @@ def sanitize_filename(filename: str, max_length: int = 255) -> str:
     if not filename:
         return "unnamed"
 
-    # Remove any directory components
-    filename = filename.split('/')[-1].split('\\')[-1]
-
-    # Remove null bytes and control characters
-    filename = ''.join(char for char in filename if ord(char) >= 32)
-    filename = filename.replace('\x00', '')
+    # Remove any directory components (slice after the last / or \, no-op if neither)
+    filename = filename[max(filename.rfind('/'), filename.rfind('\\')) + 1:]
 
-    # Remove potentially dangerous characters
-    dangerous_chars = ['<', '>', ':', '"', '|', '?', '*']
-    for char in dangerous_chars:
-        filename = filename.replace(char, '')
+    # Remove null bytes, control characters and potentially dangerous characters.
+    # Most names are already clean, so only rebuild the string when needed.
+    if _UNSAFE_FILENAME_RE.search(filename):
+        filename = filename.translate(_SANITIZE_TABLE)
 
     # Limit length while preserving extension
     if len(filename) > max_length:
@@ -254,27 +272,67 @@ def validate_file_size(size: int, max_size: Optional[int] = None) -> bool:
 # Content Security
 # ============================================================================
 
-def calculate_file_hash(content: bytes, algorithm: str = "sha256") -> str:
+HASH_CHUNK_SIZE = 64 * 1024
+
+
+def _new_hasher(algorithm: str):
+    """Create a hash object; blake3 comes from the blake3 package, the rest from hashlib."""
+    if algorithm == "blake3":
+        return blake3.blake3(max_threads=blake3.blake3.AUTO)
+    return hashlib.new(algorithm)
+
+
+def calculate_file_hash(
+        content: Union[bytes, BinaryIO, Iterable[bytes]],
+        algorithm: str = "blake3"
+) -> str:
     """
     Calculate hash of file content.
 
+    Content is fed to the hash in 64 KiB chunks so large files never need to
+    be held in memory as a single blob.
+
     Args:
-        content: File content as bytes
-        algorithm: Hash algorithm (md5, sha1, sha256, sha512)
+        content: File content as bytes, a binary file-like object, or an iterable of byte chunks
+        algorithm: Hash algorithm (blake3, or any hashlib name such as sha256 or md5)
 
     Returns:
         Hexadecimal hash string
 
     Example:
         >>> content = b"Hello, World!"
-        >>> calculate_file_hash(content)
+        >>> calculate_file_hash(content, "sha256")
         'dffd6021bb2bd5b0af676290809ec3a53191dd81c7f70a4b28688a362182986f'
     """
-    hash_func = getattr(hashlib, algorithm)()
-    hash_func.update(content)
+    hash_func = _new_hasher(algorithm)
+
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        view = memoryview(content)
+        for start in range(0, len(view), HASH_CHUNK_SIZE):
+            hash_func.update(view[start:start + HASH_CHUNK_SIZE])
+    elif hasattr(content, "read"):
+        while chunk := content.read(HASH_CHUNK_SIZE):
+            hash_func.update(chunk)
+    else:
+        for chunk in content:
+            hash_func.update(chunk)
+
     return hash_func.hexdigest()
 
 
+@lru_cache(maxsize=32)
+def _hmac_prototype(secret: bytes, algorithm: str) -> "hmac.HMAC":
+    """HMAC keyed once per (secret, algorithm); callers work on a copy."""
+    return hmac.new(secret, None, algorithm)
+
+
+def _hmac_digest(data: str, secret: str, algorithm: str) -> "hmac.HMAC":
+    """Return an HMAC over data, reusing the cached key schedule for secret."""
+    mac = _hmac_prototype(secret.encode(), algorithm).copy()
+    mac.update(data.encode())
+    return mac
+
+
 def verify_hmac_signature(
         data: str,
         signature: str,
@@ -299,13 +357,12 @@ def verify_hmac_signature(
         >>> verify_hmac_signature(data, sig, "secret")
         True
     """
-    expected_signature = hmac.new(
-        secret.encode(),
-        data.encode(),
-        algorithm
-    ).hexdigest()
+    try:
+        signature_bytes = bytes.fromhex(signature)
+    except ValueError:
+        return False
 
-    return secrets.compare_digest(signature, expected_signature)
+    return hmac.compare_digest(signature_bytes, _hmac_digest(data, secret, algorithm).digest())
 
 
 def create_hmac_signature(
@@ -324,11 +381,7 @@ def create_hmac_signature(
     Returns:
         Hexadecimal signature string
     """
-    return hmac.new(
-        secret.encode(),
-        data.encode(),
-        algorithm
-    ).hexdigest()
+    return _hmac_digest(data, secret, algorithm).hexdigest()
 
 
 # ============================================================================
@@ -349,7 +402,9 @@ def get_client_ip(request: Request) -> str:
     # Check X-Forwarded-For header (from proxy)
     forwarded = request.headers.get("X-Forwarded-For")
     if forwarded:
-        return forwarded.split(",")[0].strip()
+        # First hop only; slicing avoids building a list of every proxy
+        comma = forwarded.find(",")
+        return (forwarded[:comma] if comma >= 0 else forwarded).strip()
 
     # Check X-Real-IP header
     real_ip = request.headers.get("X-Real-IP")
@@ -363,13 +418,13 @@ def get_client_ip(request: Request) -> str:
     return "unknown"
 
 
-def is_safe_redirect_url(url: str, allowed_hosts: Optional[List[str]] = None) -> bool:
+def is_safe_redirect_url(url: str, allowed_hosts: Optional[AbstractSet[str]] = None) -> bool:
     """
     Check if redirect URL is safe (prevents open redirect vulnerabilities).
 
     Args:
         url: URL to validate
-        allowed_hosts: List of allowed hostnames
+        allowed_hosts: Set of allowed hostnames (a frozenset built once by the caller)
 
     Returns:
         True if URL is safe, False otherwise
@@ -383,9 +438,7 @@ def is_safe_redirect_url(url: str, allowed_hosts: Optional[List[str]] = None) ->
 
     # Check against allowed hosts
     if allowed_hosts:
-        from urllib.parse import urlparse
-        parsed = urlparse(url)
-        return parsed.netloc in allowed_hosts
+        return urlparse(url).netloc in allowed_hosts
 
     return False
 
@@ -412,10 +465,10 @@ def is_session_expired(created_at: float, timeout: int) -> bool:
     Check if session has expired.
 
     Args:
-        created_at: Session creation timestamp
+        created_at: Session creation timestamp (epoch seconds, as stored by the session manager)
         timeout: Session timeout in seconds
 
     Returns:
         True if expired, False otherwise
     """
-    return (datetime.now().timestamp() - created_at) > timeout
\ No newline at end of file
+    return (time.time() - created_at) > timeout
\ No newline at end of file
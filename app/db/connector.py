@@ -1,43 +1,103 @@
 """
 Database connection utilities.
 """
+import hashlib
 import logging
+from collections import OrderedDict
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
 from sqlalchemy import create_engine, Engine
 from sqlalchemy.pool import QueuePool
 
+from app.core.config import quote_credential
 from app.models.db_config import DBConfigBase
 from app.models.types import DBType
 
 logger = logging.getLogger(__name__)
 
 
-def _build_connection_url(db_config: DBConfigBase) -> str:
-    """Build SQLAlchemy connection URL from configuration."""
-    if db_config.db_type == DBType.MYSQL:
-        return (
-            f"mysql+pymysql://{db_config.user}:{db_config.password}"
-            f"@{db_config.host}:{db_config.port}/{db_config.db}"
-        )
-    elif db_config.db_type in [DBType.POSTGRES, DBType.POSTGRESQL]:
+@lru_cache(maxsize=64)
+def _sqlalchemy_url(scheme: str) -> Callable[[DBConfigBase], str]:
+    """Return a URL builder for a server database reachable over host/port."""
+    def build(db_config: DBConfigBase) -> str:
         return (
-            f"postgresql+psycopg2://{db_config.user}:{db_config.password}"
+            f"{scheme}://{quote_credential(db_config.user)}:{quote_credential(db_config.password)}"
             f"@{db_config.host}:{db_config.port}/{db_config.db}"
         )
-    elif db_config.db_type == DBType.ORACLE:
-        return (
-            f"oracle+cx_oracle://{db_config.user}:{db_config.password}"
-            f"@{db_config.host}:{db_config.port}/?service_name={db_config.db}"
-        )
-    elif db_config.db_type == DBType.SQLITE:
-        return f"sqlite:///{db_config.db}"
-    else:
-        raise ValueError(f"Unsupported database type: {db_config.db_type}")
+    return build
+
+
+def _oracle_url(db_config: DBConfigBase) -> str:
+    return (
+        f"oracle+cx_oracle://{quote_credential(db_config.user)}:{quote_credential(db_config.password)}"
+        f"@{db_config.host}:{db_config.port}/?service_name={db_config.db}"
+    )
+
+
+def _sqlite_url(db_config: DBConfigBase) -> str:
+    return f"sqlite:///{db_config.db}"
+
+
+_URL_BUILDERS: Dict[DBType, Callable[[DBConfigBase], str]] = {
+    DBType.MYSQL: _sqlalchemy_url("mysql+pymysql"),
+    DBType.POSTGRES: _sqlalchemy_url("postgresql+psycopg2"),
+    DBType.POSTGRESQL: _sqlalchemy_url("postgresql+psycopg2"),
+    DBType.ORACLE: _oracle_url,
+    DBType.SQLITE: _sqlite_url,
+}
+
+
+MAX_CACHED_ENGINES = 16  # Least recently used engines beyond this count are disposed
+
+# Engines are kept so their connection pools get reused, least recently used first.
+# Configs come from request bodies, so the cache is bounded and evicted pools are closed.
+_ENGINE_CACHE: "OrderedDict[Tuple, Engine]" = OrderedDict()
+
+
+# Pool sizing used when the config does not carry its own (DBConfigBase)
+DEFAULT_POOL_SIZE = 5
+DEFAULT_MAX_OVERFLOW = 10
+POOL_RECYCLE_SECONDS = 3600  # Replace connections before server-side idle timeouts drop them
+
+
+def _pool_options(db_config: DBConfigBase) -> Tuple[int, int]:
+    """Pool size and overflow requested by the config, falling back to the defaults."""
+    pool_size = getattr(db_config, "pool_size", None) or DEFAULT_POOL_SIZE
+    max_overflow = getattr(db_config, "max_overflow", None)
+    return pool_size, DEFAULT_MAX_OVERFLOW if max_overflow is None else max_overflow
+
+
+def _engine_key(db_config: DBConfigBase) -> Tuple:
+    """Identify an engine by its connection parameters without keeping the raw password."""
+    password_digest = hashlib.sha256(db_config.password.encode()).hexdigest()
+    return (
+        db_config.db_type,
+        db_config.host,
+        db_config.port,
+        db_config.db,
+        db_config.user,
+        password_digest,
+        _pool_options(db_config),
+    )
+
+
+def _build_connection_url(db_config: DBConfigBase) -> str:
+    """Build SQLAlchemy connection URL from configuration."""
+    try:
+        build = _URL_BUILDERS[db_config.db_type]
+    except KeyError:
+        raise ValueError(f"Unsupported database type: {db_config.db_type}") from None
+    return build(db_config)
 
 
 async def connect_db(db_config: DBConfigBase) -> Engine:
     """
-    Create and return a database connection engine.
+    Return a pooled database connection engine for this configuration.
+    
+    Engines are cached by connection parameters, so repeated calls share one
+    connection pool. At most MAX_CACHED_ENGINES are kept: the least recently
+    used one is disposed on overflow, the rest by dispose_engines() at shutdown.
     
     Args:
         db_config: Database configuration
@@ -48,19 +108,32 @@ async def connect_db(db_config: DBConfigBase) -> Engine:
     Note:
         Returns a synchronous engine. For async operations, use async context manager.
     """
+    key = _engine_key(db_config)
+    engine = _ENGINE_CACHE.get(key)
+    if engine is not None:
+        _ENGINE_CACHE.move_to_end(key)
+        return engine
+
     try:
         connection_url = _build_connection_url(db_config)
         
         # Create engine with connection pooling
+        pool_size, max_overflow = _pool_options(db_config)
         engine = create_engine(
             connection_url,
             poolclass=QueuePool,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
             pool_pre_ping=True,  # Verify connections before using
+            pool_recycle=POOL_RECYCLE_SECONDS,
             echo=False,
         )
         
+        _ENGINE_CACHE[key] = engine
+        if len(_ENGINE_CACHE) > MAX_CACHED_ENGINES:
+            # Connections checked out from the evicted pool stay usable and are closed on release
+            _, evicted = _ENGINE_CACHE.popitem(last=False)
+            evicted.dispose()
         logger.info(f"Connected to {db_config.db_type} database: {db_config.db}")
         return engine
         
@@ -69,19 +142,31 @@ async def connect_db(db_config: DBConfigBase) -> Engine:
         raise
 
 
+def discard_engine(db_config: DBConfigBase) -> None:
+    """Dispose the cached engine of this configuration, e.g. after it failed to connect."""
+    engine = _ENGINE_CACHE.pop(_engine_key(db_config), None)
+    if engine is not None:
+        engine.dispose()
+
+
+def dispose_engines() -> None:
+    """Dispose every cached engine and close its pooled connections."""
+    while _ENGINE_CACHE:
+        _, engine = _ENGINE_CACHE.popitem()
+        engine.dispose()
+
+
 @asynccontextmanager
 async def get_db_connection(db_config: DBConfigBase):
     """
     Async context manager for database connections.
     
+    The connection is returned to the shared pool on exit.
+    
     Usage:
         async with get_db_connection(db_config) as conn:
             result = await conn.execute(query)
     """
     engine = await connect_db(db_config)
-    try:
-        with engine.connect() as connection:
-            yield connection
-    finally:
-        engine.dispose()
-
+    with engine.connect() as connection:
+        yield connection
@@ -5,19 +5,24 @@ FastAPI application for building Neo4j knowledge graphs from multiple data sourc
 import time
 import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.core.config import settings
 from app.core.logging import setup_logging
 from app.api.v1.router import api_router
+from app.api.middleware import RequestSizeLimitMiddleware
+from app.utils.serialization import DefaultJSONResponse, dumps
 
 # Setup logging
-setup_logging()
+setup_logging(
+    json_logs=settings.is_production,  # JSON logs in production
+    colored_console=settings.is_development  # Colors in development
+)
 logger = logging.getLogger(__name__)
 
 
@@ -33,10 +38,10 @@ async def lifespan(app: FastAPI):
     logger.info("Debug mode: %s", settings.debug)
 
     # Initialize dependencies
-    from app.api.dependencies import get_session_manager
+    from app.api.dependencies import get_session_manager, get_graph_builder
     from app.services.neo4j.singleton import neo4j_driver
 
-    app.state.session_manager = get_session_manager()
+    app.state.session_manager = await get_session_manager()
     logger.info("Session manager initialized")
 
     # Optional: Initialize Neo4j connection pool
@@ -47,6 +52,10 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning("Neo4j driver initialization failed: %s", e)
 
+    # Probe Neo4j in the background so status endpoints do not hit it per request
+    if not settings.debug:
+        neo4j_driver.start_probe(settings.neo4j_probe_interval)
+
     logger.info("%s started successfully on %s:%s", settings.app_name, settings.host, settings.port)
 
     yield
@@ -55,12 +64,31 @@ async def lifespan(app: FastAPI):
     logger.info("Shutting down %s...", settings.app_name)
 
     # Cleanup Neo4j connections
+    await neo4j_driver.stop_probe()
     try:
         await neo4j_driver.close()
         logger.info("Neo4j connections closed")
     except Exception as e:
         logger.error("Error closing Neo4j connections: %s", e)
 
+    # Close the shared graph builder driver if it was ever created
+    if get_graph_builder.cache_info().currsize:
+        try:
+            await get_graph_builder().close()
+            get_graph_builder.cache_clear()
+            logger.info("Graph builder connections closed")
+        except Exception as e:
+            logger.error("Error closing graph builder connections: %s", e)
+
+    # Stop the Excel parsing processes if any were started
+    from app.services.file_loader import shutdown_parse_pool
+    shutdown_parse_pool()
+
+    # Release pooled SQL connections
+    from app.db.connector import dispose_engines
+    dispose_engines()
+    logger.info("Database engines disposed")
+
     logger.info("Shutdown complete")
 
 
@@ -71,6 +99,7 @@ app = FastAPI(
     version="0.1.0",
     debug=settings.debug,
     lifespan=lifespan,
+    default_response_class=DefaultJSONResponse,
     docs_url="/docs" if settings.debug else None,
     redoc_url="/redoc" if settings.debug else None,
     openapi_url="/openapi.json" if settings.debug else None,
@@ -91,29 +120,30 @@ app.add_middleware(
 )
 
 # GZip Compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=settings.gzip_compress_level)
+
+# Refuse oversized requests from their Content-Length before reading the body.
+# This caps the whole body; the per-file max_upload_size is checked in upload_files.
+app.add_middleware(RequestSizeLimitMiddleware, max_body_size=settings.max_request_size)
 
-# Request timing middleware
+# Liveness probes hit these constantly; they are timed but not logged
+_UNLOGGED_PATHS = frozenset({"/health", f"/api/{settings.api_version}/health"})
+
+
+# Request timing and logging middleware
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next): # pyright: ignore[reportMissingParameterType, reportUnknownParameterType]
-    """Add processing time to response headers."""
-    start_time = time.time()
+    """Add processing time to response headers and log the completed request."""
+    start_time = time.perf_counter()
     response = await call_next(request) # pyright: ignore[reportUnknownVariableType]
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(f"{process_time:.4f}") # pyright: ignore[reportUnknownMemberType]
+    process_time = time.perf_counter() - start_time
+    response.headers["X-Process-Time"] = f"{process_time:.4f}" # pyright: ignore[reportUnknownMemberType]
+    path = request.url.path
+    if path not in _UNLOGGED_PATHS and logger.isEnabledFor(logging.INFO):
+        logger.info("%s %s - %s in %.4fs", request.method, path, response.status_code, process_time) # pyright: ignore[reportUnknownMemberType]
     return response # pyright: ignore[reportUnknownVariableType]
 
 
-# Request logging middleware
-@app.middleware("http")
-async def log_requests(request: Request, call_next): # type: ignore
-    """Log all incoming requests."""
-    logger.info("%s %s", request.method, request.url.path)
-    response = await call_next(request) # type: ignore
-    logger.info("%s %s - Status: %s", request.method, request.url.path, response.status_code) # type: ignore
-    return response # type: ignore
-
-
 # ============================================================================
 # Exception Handlers
 # ============================================================================
@@ -122,7 +152,7 @@ async def log_requests(request: Request, call_next): # type: ignore
 async def http_exception_handler(_request: Request, exc: StarletteHTTPException):
     """Handle HTTP exceptions."""
     logger.error("HTTP error: %s - %s", exc.status_code, exc.detail)
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=exc.status_code,
         content={
             "error": {
@@ -131,6 +161,7 @@ async def http_exception_handler(_request: Request, exc: StarletteHTTPException)
                 "status_code": exc.status_code,
             }
         },
+        headers=exc.headers,
     )
 
 
@@ -138,13 +169,13 @@ async def http_exception_handler(_request: Request, exc: StarletteHTTPException)
 async def validation_exception_handler(_request: Request, exc: RequestValidationError):
     """Handle validation errors."""
     logger.error("Validation error: %s", exc.errors())
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=422,
         content={
             "error": {
                 "type": "ValidationError",
                 "message": "Request validation failed",
-                "details": exc.errors(),
+                "details": jsonable_encoder(exc.errors()),
             }
         },
     )
@@ -154,7 +185,7 @@ async def validation_exception_handler(_request: Request, exc: RequestValidation
 async def general_exception_handler(_request: Request, exc: Exception):
     """Handle all other exceptions."""
     logger.exception("Unhandled exception: %s", exc)
-    return JSONResponse(
+    return DefaultJSONResponse(
         status_code=500,
         content={
             "error": {
@@ -171,18 +202,33 @@ async def general_exception_handler(_request: Request, exc: Exception):
 # ============================================================================
 
 # Health check endpoint (always available)
+# Health and root payloads only depend on settings, encode them once
+_HEALTH_BYTES = dumps({
+    "status": "healthy",
+    "service": settings.app_name,
+    "version": "0.1.0",
+    "environment": settings.environment,
+})
+
+_ROOT_BYTES = dumps({
+    "message": f"Welcome to {settings.app_name}",
+    "version": "0.1.0",
+    "environment": settings.environment,
+    "documentation": "/docs" if settings.debug else "Contact admin for API docs",
+    "health": "/health",
+    "api": {
+        "v1": "/api/v1"
+    }
+})
+
+
 @app.get("/health", tags=["health"])
 async def health_check():
     """
     Health check endpoint.
     Returns the service status and version.
     """
-    return {
-        "status": "healthy",
-        "service": settings.app_name,
-        "version": "0.1.0",
-        "environment": settings.environment,
-    }
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 # Root endpoint
@@ -192,16 +238,7 @@ async def root(): # type: ignore
     Root endpoint.
     Returns API information and available endpoints.
     """
-    return {
-        "message": f"Welcome to {settings.app_name}",
-        "version": "0.1.0",
-        "environment": settings.environment,
-        "documentation": "/docs" if settings.debug else "Contact admin for API docs",
-        "health": "/health",
-        "api": {
-            "v1": "/api/v1"
-        }
-    } # type: ignore
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 
 # Include API router
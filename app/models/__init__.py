@@ -1,19 +1,23 @@
 """Pydantic models."""
 
 from app.models.base import BaseSchema
-from app.models.types import DBType, SourceType
-from app.models.db_config import DBConfig, DBConfigBase
+from app.models.types import DBType, FilterOperator, SourceType
+from app.models.db_config import DBConfig, DBConfigBase, RowFilter
 from app.models.graph_config import GraphConfig, GraphElement
 from app.models.response_data import DataResponses, TableData
+from app.models.query import QueryRequest
 
 __all__ = [
     "BaseSchema",
     "DBType",
+    "FilterOperator",
     "SourceType",
     "DBConfig",
     "DBConfigBase",
+    "RowFilter",
     "GraphConfig",
     "GraphElement",
     "DataResponses",
     "TableData",
+    "QueryRequest",
 ]
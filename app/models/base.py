@@ -5,11 +5,11 @@ from pydantic import BaseModel, ConfigDict
 
 
 class BaseSchema(BaseModel):
-    """Base schema with common configuration."""
+    """Base schema with common configuration. Instances are immutable once validated."""
     model_config = ConfigDict(
         str_strip_whitespace=True,
-        validate_assignment=True,
         use_enum_values=True,
         extra="forbid",
+        frozen=True,
     )
 
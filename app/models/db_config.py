@@ -1,11 +1,17 @@
 """
 Database configuration models.
 """
-from typing import Optional
-from pydantic import Field
+from typing import List, Optional, Union
+from pydantic import Field, model_validator
 
 from app.models.base import BaseSchema
-from app.models.types import DBType
+from app.models.types import DBType, FilterOperator
+
+FilterValue = Union[bool, int, float, str]
+
+# Operators that take no value, and those that take a list of values
+_NULL_OPERATORS = (FilterOperator.IS_NULL, FilterOperator.IS_NOT_NULL)
+_LIST_OPERATORS = (FilterOperator.IN, FilterOperator.NOT_IN)
 
 
 class DBConfigBase(BaseSchema):
@@ -18,10 +24,34 @@ class DBConfigBase(BaseSchema):
     password: str = Field(..., description="Database password")
 
 
+class RowFilter(BaseSchema):
+    """Condition on one column of a table; the value is sent as a bound parameter."""
+    column: str = Field(..., min_length=1, description="Column of table_name to filter on")
+    op: FilterOperator = Field(FilterOperator.EQ, description="Comparison operator")
+    value: Optional[Union[FilterValue, List[FilterValue]]] = Field(
+        None, description="Value to compare with: a list for 'in'/'not in', omitted for 'is null'/'is not null'"
+    )
+
+    @model_validator(mode="after")
+    def check_value(self) -> "RowFilter":
+        """Require a value shape that matches the operator."""
+        if self.op in _NULL_OPERATORS:
+            if self.value is not None:
+                raise ValueError(f"'{self.op}' takes no value")
+        elif self.op in _LIST_OPERATORS:
+            if not isinstance(self.value, list) or not self.value:
+                raise ValueError(f"'{self.op}' needs a non-empty list of values")
+        elif self.value is None or isinstance(self.value, list):
+            raise ValueError(f"'{self.op}' needs a single value")
+        return self
+
+
 class DBConfig(DBConfigBase):
     """Complete database configuration with optional query."""
     query: Optional[str] = Field(None, description="Optional SQL query to execute")
     table_name: Optional[str] = Field(None, description="Optional table name to load")
+    columns: Optional[List[str]] = Field(None, min_length=1, description="Optional columns to select from table_name (default: all)")
+    where: Optional[List[RowFilter]] = Field(None, min_length=1, description="Optional filters on table_name rows, combined with AND")
     limit: Optional[int] = Field(None, ge=1, description="Optional limit on rows to load")
     pool_size: Optional[int] = Field(5, ge=1, description="Database connection pool size")
     max_overflow: Optional[int] = Field(10, ge=0, description="Maximum overflow size for connection pool")
@@ -0,0 +1,17 @@
+"""
+Cypher query request models.
+"""
+from typing import Any, Dict
+from pydantic import Field
+
+from app.models.base import BaseSchema
+
+
+class QueryRequest(BaseSchema):
+    """Custom Cypher query with its parameters.
+
+    Literals should be passed as `$name` placeholders in the query and their
+    values in `parameters`, so Neo4j can reuse one cached plan per query shape.
+    """
+    query: str = Field(..., min_length=1, description="Cypher query using $name placeholders")
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Query parameter values by name")
@@ -13,6 +13,21 @@ class DBType(str, Enum):
     SQLITE = "sqlite"
 
 
+class FilterOperator(str, Enum):
+    """Comparison operators accepted in table row filters."""
+    EQ = "="
+    NE = "!="
+    LT = "<"
+    LE = "<="
+    GT = ">"
+    GE = ">="
+    IN = "in"
+    NOT_IN = "not in"
+    LIKE = "like"
+    IS_NULL = "is null"
+    IS_NOT_NULL = "is not null"
+
+
 class SourceType(str, Enum):
     """Data source types."""
     FILE = "file"
@@ -0,0 +1,82 @@
+"""
+In-process cache-aside helpers for expensive read paths.
+Entries expire after a TTL and can be invalidated explicitly by write paths.
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from app.core.config import settings
+
+MAX_ENTRIES = 1024  # Oldest entries are evicted beyond this count
+
+# key -> (expiry_monotonic, value), in insertion order
+_entries: Dict[Hashable, Tuple[float, Any]] = {}
+# One lock per key so a slow loader only blocks callers of the same key
+_locks: Dict[Hashable, asyncio.Lock] = {}
+
+
+async def get_or_set(
+        key: Hashable,
+        ttl: float,
+        loader: Callable[[], Awaitable[Any]]
+) -> Tuple[Any, bool]:
+    """
+    Return the cached value for key, calling loader on a miss.
+
+    Concurrent misses on the same key wait for a single loader call.
+
+    Args:
+        key: Cache key
+        ttl: Seconds the loaded value stays valid (0 disables caching)
+        loader: Coroutine function producing the value
+
+    Returns:
+        Tuple of (value, hit)
+    """
+    if ttl <= 0:
+        return await loader(), False
+
+    entry = _entries.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1], True
+
+    lock = _locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        # Another caller may have filled the entry while we waited
+        entry = _entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1], True
+
+        value = await loader()
+        _entries.pop(key, None)
+        _entries[key] = (time.monotonic() + ttl, value)
+        if len(_entries) > MAX_ENTRIES:
+            _evict()
+        return value, False
+
+
+def _evict() -> None:
+    """Drop expired entries, then the oldest ones until back under MAX_ENTRIES."""
+    now = time.monotonic()
+    for key in [k for k, (expiry, _) in _entries.items() if expiry <= now]:
+        del _entries[key]
+    while len(_entries) > MAX_ENTRIES:
+        del _entries[next(iter(_entries))]
+    for key in [k for k, lock in _locks.items() if k not in _entries and not lock.locked()]:
+        del _locks[key]
+
+
+def invalidate(key: Hashable) -> bool:
+    """Drop the cached value for key. Returns True if an entry was removed."""
+    return _entries.pop(key, None) is not None
+
+
+def clear() -> None:
+    """Drop every cached value."""
+    _entries.clear()
+
+
+def neo4j_stats_key() -> Tuple[str, str]:
+    """Cache key of the Neo4j statistics for the configured database."""
+    return ("neo4j_stats", settings.neo4j_database)
@@ -1,21 +1,147 @@
 """
 Database loading utilities.
 """
+import asyncio
 import logging
-from typing import List, Optional
+import time
+from typing import Dict, List, Optional, Tuple
 # import polars as pl
 import pandas as pd
-from sqlalchemy import text, inspect
-from sqlalchemy.engine import Engine
-from app.models.types import DBType
+import pyarrow as pa
+from sqlalchemy import Integer, bindparam, text, inspect
+from sqlalchemy.engine import CursorResult, Engine
+from sqlalchemy.sql.elements import BindParameter, TextClause
+from app.models.db_config import RowFilter
+from app.models.types import DBType, FilterOperator
 
 logger = logging.getLogger(__name__)
 
+FETCH_CHUNK_SIZE = 100_000  # Rows pulled from the server-side cursor per batch
+SCHEMA_CACHE_TTL = 60  # Seconds a reflected table/column listing is reused
+
+# engine -> (expiry_monotonic, {table_name: [column names]})
+_schema_cache: Dict[Engine, Tuple[float, Dict[str, List[str]]]] = {}
+
+
+def _reflect_schema(engine: Engine) -> Dict[str, List[str]]:
+    """Read every table's columns in one catalog pass. Blocking; called from a worker thread."""
+    multi_columns = inspect(engine).get_multi_columns()
+    return {
+        table_name: [col['name'] for col in columns]
+        for (_, table_name), columns in sorted(multi_columns.items())
+    }
+
+
+async def _get_schema(engine: Engine) -> Dict[str, List[str]]:
+    """Return the table/column listing for engine, reflecting it again once the TTL expires."""
+    entry = _schema_cache.get(engine)
+    if entry is not None and entry[0] > time.monotonic():
+        return entry[1]
+    schema = await asyncio.to_thread(_reflect_schema, engine)
+    now = time.monotonic()
+    # Drop expired listings so engines disposed by the connector are not kept alive here
+    for stale in [key for key, (expiry, _) in _schema_cache.items() if expiry <= now]:
+        del _schema_cache[stale]
+    _schema_cache[engine] = (now + SCHEMA_CACHE_TTL, schema)
+    return schema
+
+
+def _result_to_frame(result: CursorResult) -> pd.DataFrame:
+    """
+    Build a DataFrame from a query result, FETCH_CHUNK_SIZE rows at a time.
+    Each chunk becomes an Arrow table so only one chunk of Python row objects
+    is alive at once; the chunks are stitched together without copying.
+    """
+    columns = list(result.keys())
+    tables: List[pa.Table] = []
+
+    for partition in result.partitions(FETCH_CHUNK_SIZE):
+        try:
+            arrays = [pa.array(values) for values in zip(*partition, strict=True)]
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed Python types in a column: let pandas keep them as objects
+            frames = [table.to_pandas() for table in tables]
+            frames.append(pd.DataFrame.from_records(partition, columns=columns))
+            frames.extend(
+                pd.DataFrame.from_records(rest, columns=columns)
+                for rest in result.partitions(FETCH_CHUNK_SIZE)
+            )
+            return pd.concat(frames, ignore_index=True)
+        tables.append(pa.Table.from_arrays(arrays, names=columns))
+
+    if not tables:
+        return pd.DataFrame(columns=columns)
+    table = pa.concat_tables(tables, promote_options="permissive")
+    return table.to_pandas(self_destruct=True)
+
+
+def _read_frame(engine: Engine, query: TextClause, max_rows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Run a query on a streaming connection. Blocking; called from a worker thread.
+    With max_rows, only that many rows are pulled from the cursor.
+    """
+    with engine.connect().execution_options(stream_results=True) as conn:
+        result = conn.execute(query)
+        if max_rows is not None:
+            return pd.DataFrame.from_records(result.fetchmany(max_rows), columns=list(result.keys()))
+        return _result_to_frame(result)
+
+
+async def _checked_table_name(engine: Engine, table_name: str) -> str:
+    """
+    Identifiers cannot be bound, so the table name is only interpolated once it
+    is known to exist; it is then quoted by the dialect.
+    Schema-qualified names (schema.table) are checked in that schema and each
+    part is quoted on its own.
+    """
+    *schema_parts, name = table_name.split(".")
+    if not all(schema_parts) or not name:
+        raise ValueError(f"Invalid table name: {table_name}")
+    schema = ".".join(schema_parts) or None
+
+    if schema is not None or name not in await _get_schema(engine):
+        exists = await asyncio.to_thread(lambda: inspect(engine).has_table(name, schema=schema))
+        if not exists:
+            raise ValueError(f"Unknown table: {table_name}")
+    preparer = engine.dialect.identifier_preparer
+    return ".".join(preparer.quote(part) for part in (*schema_parts, name))
+
+
+def _filter_conditions(
+    filters: List[RowFilter],
+    known_columns: List[str],
+    quote
+) -> Tuple[List[str], List[BindParameter]]:
+    """
+    Turn row filters into SQL conditions and their bound parameters.
+    Column names must belong to the table and are quoted by the dialect;
+    values are never interpolated into the statement.
+    """
+    conditions: List[str] = []
+    params: List[BindParameter] = []
+    for index, row_filter in enumerate(filters):
+        if row_filter.column not in known_columns:
+            raise ValueError(f"Unknown column: {row_filter.column}")
+        column = quote(row_filter.column)
+        op = FilterOperator(row_filter.op)
+        if op in (FilterOperator.IS_NULL, FilterOperator.IS_NOT_NULL):
+            conditions.append(f"{column} {op.value.upper()}")
+            continue
+        name = f"filter_{index}"
+        conditions.append(f"{column} {op.value.upper()} :{name}")
+        # IN lists expand to one placeholder per value
+        expanding = op in (FilterOperator.IN, FilterOperator.NOT_IN)
+        params.append(bindparam(name, value=row_filter.value, expanding=expanding))
+    return conditions, params
+
+
 async def load_table_from_db(
     engine: Engine,
     table_name: str,
     limit: Optional[int] = None,
-    db_type: Optional[DBType] = None
+    db_type: Optional[DBType] = None,
+    columns: Optional[List[str]] = None,
+    where: Optional[List[RowFilter]] = None
 ) -> pd.DataFrame:
     """
     Load a table from database as Polars DataFrame.
@@ -25,64 +151,61 @@ async def load_table_from_db(
         table_name: Name of the table to load
         limit: Optional limit on number of rows
         db_type: Database type (for SQL dialect differences)
+        columns: Optional subset of columns to select (default: all)
+        where: Optional row filters, combined with AND and applied by the database
         
     Returns:
         Polars DataFrame
     """
     try:
-        # Build query
-        if limit:
-            if db_type == DBType.ORACLE:
-                query = text(f"SELECT * FROM {table_name} WHERE ROWNUM <= {limit}")
-            elif db_type == DBType.POSTGRES or db_type == DBType.POSTGRESQL:
-                query = text(f"SELECT * FROM {table_name} LIMIT {limit}")
-            else:
-                query = text(f"SELECT * FROM {table_name} LIMIT {limit}")
+        # Only the requested columns cross the wire; names are quoted by the dialect
+        if columns:
+            quote = engine.dialect.identifier_preparer.quote
+            select_list = ", ".join(quote(col) for col in columns)
         else:
-            query = text(f"SELECT * FROM {table_name}")
+            select_list = "*"
         
-        # Execute query and convert to pandas first, then polars
-        with engine.connect() as conn:
-            result = conn.execute(query)
-            # Convert to pandas DataFrame
-            df_pandas = result.fetchall()
-            columns = result.keys()
-            
-            # Convert to Polars DataFrame
-            if df_pandas:
-                df_dict = {col: [row[i] for row in df_pandas] for i, col in enumerate(columns)}
-                return pd.DataFrame(df_dict)
-            else:
-                # Empty result
-                return pd.DataFrame({col: [] for col in columns})
+        # Build query; filtering and row limits run on the database server.
+        # Filter values and the limit are bound parameters so the statement text
+        # stays the same across calls and the server can reuse its plan.
+        conditions: List[str] = []
+        params: List[BindParameter] = []
+        if where:
+            known_columns = await get_table_columns(engine, table_name)
+            conditions, params = _filter_conditions(where, known_columns, engine.dialect.identifier_preparer.quote)
+        if limit and db_type == DBType.ORACLE:
+            conditions.append("ROWNUM <= :row_limit")
+        
+        sql = f"SELECT {select_list} FROM {await _checked_table_name(engine, table_name)}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        if limit and db_type != DBType.ORACLE:
+            sql += " LIMIT :row_limit"
+        if limit:
+            params.append(bindparam("row_limit", value=limit, type_=Integer))
+        query = text(sql).bindparams(*params)
+        
+        return await asyncio.to_thread(_read_frame, engine, query)
                 
     except Exception as e:
         logger.error(f"Error loading table {table_name}: {e}")
         raise
 
 
-async def execute_query(engine: Engine, query: str) -> pd.DataFrame:
+async def execute_query(engine: Engine, query: str, max_rows: Optional[int] = None) -> pd.DataFrame:
     """
     Execute a custom SQL query and return as Polars DataFrame.
     
     Args:
         engine: SQLAlchemy engine
         query: SQL query string
+        max_rows: Optional cap on rows fetched (the query itself is not rewritten)
         
     Returns:
         Polars DataFrame
     """
     try:
-        with engine.connect() as conn:
-            result = conn.execute(text(query))
-            columns = result.keys()
-            rows = result.fetchall()
-            
-            if rows:
-                df_dict = {col: [row[i] for row in rows] for i, col in enumerate(columns)}
-                return pd.DataFrame(df_dict)
-            else:
-                return pd.DataFrame({col: [] for col in columns})
+        return await asyncio.to_thread(_read_frame, engine, text(query), max_rows)
                 
     except Exception as e:
         logger.error(f"Error executing query: {e}")
@@ -99,14 +222,29 @@ async def list_tables(engine: Engine) -> List[str]:
         List of table names
     """
     try:
-        inspector = inspect(engine)
-        tables = inspector.get_table_names()
-        return tables
+        return list(await _get_schema(engine))
     except Exception as e:
         logger.error(f"Error listing tables: {e}")
         raise
 
 
+async def get_schema_columns(engine: Engine) -> Dict[str, List[str]]:
+    """
+    Get column names for every table from one reflected snapshot.
+    
+    Args:
+        engine: SQLAlchemy engine
+        
+    Returns:
+        Mapping of table name to column names
+    """
+    try:
+        return await _get_schema(engine)
+    except Exception as e:
+        logger.error(f"Error reflecting schema: {e}")
+        raise
+
+
 async def get_table_columns(engine: Engine, table_name: str) -> List[str]:
     """
     Get column names for a table.
@@ -119,9 +257,15 @@ async def get_table_columns(engine: Engine, table_name: str) -> List[str]:
         List of column names
     """
     try:
-        inspector = inspect(engine)
-        columns = [col['name'] for col in inspector.get_columns(table_name)]
-        return columns
+        schema = await _get_schema(engine)
+        if table_name in schema:
+            return schema[table_name]
+        # Not a plain table of the default schema (view, qualified name): ask directly
+        *schema_parts, name = table_name.split(".")
+        columns = await asyncio.to_thread(
+            lambda: inspect(engine).get_columns(name, schema=".".join(schema_parts) or None)
+        )
+        return [col['name'] for col in columns]
     except Exception as e:
         logger.error(f"Error getting columns for {table_name}: {e}")
         raise
@@ -1,219 +1,163 @@
-# import pandas as pd
-# from io import StringIO
-# from app.utils.data_manip import detect_encoding, detect_separator
-#
-# async def load_file(content, filename) -> pd.DataFrame:
-#     encoding = detect_encoding(content)  # Detect encoding automatically: utf-8, latin1, ...
-#     content = content.decode(encoding)
-#
-#     # Detect the separator value automatically (`,` or `;` or `\t` or `|`, ...)
-#     sep = detect_separator(content)
-#
-#     if filename.endswith(".csv") or filename.endswith(".tsv") or filename.endswith(".dsv"):
-#         result = pd.read_csv(StringIO(content), sep=sep)
-#
-#     elif filename.endswith(".json"):
-#         result = pd.read_json(StringIO(content))
-#
-#     elif filename.endswith(".xlsx") or filename.endswith(".xls"):
-#         result = pd.read_excel(content)
-#
-#     elif filename.endswith(".parquet"):
-#         result = pd.read_parquet(content)
-#
-#     elif filename.endswith(".txt"):
-#         result = pd.read_csv(StringIO(content), delimiter=sep)
-#
-#     else:
-#         raise ValueError("File format not supported")
-#
-#     return pd.DataFrame(result)
-
-# import os
-# import tempfile
-# import pandas as pd
-# from io import BytesIO, StringIO
-# from time import time
-# from app.utils.data_manip import detect_encoding, detect_separator
-#
-# try:
-#     from tqdm import tqdm
-#     USE_TQDM = True
-# except ImportError:
-#     USE_TQDM = False
-#
-# CACHE_THRESHOLD = 1 * 1024 * 1024 * 1024  # 1 GB
-# CHUNK_SIZE = 500_000  # Rows per chunk when streaming CSV
-#
-# async def load_file(content: bytes, filename: str) -> pd.DataFrame:
-#     """
-#     Load large files efficiently using:
-#       - Lazy loading (chunked reading)
-#       - Temporary on-disk caching (Parquet)
-#       - Progress logs and timing
-#     """
-#     start_time = time()
-#     file_size = len(content)
-#     encoding = detect_encoding(content)
-#     use_disk_cache = file_size >= CACHE_THRESHOLD
-#
-#     print(f"Loading file: {filename}")
-#     print(f"   Approx. size: {file_size / (1024 ** 2):.2f} MB")
-#     print(f"   Detected encoding: {encoding}")
-#     print(f"   Mode: {'disk cache (size > 1GB)' if use_disk_cache else 'in-memory'}")
-#
-#     temp_parquet_path = None
-#     df = None
-#
-#     # ----- CSV/TSV/DSV/TXT -----
-#     if filename.endswith((".csv", ".tsv", ".dsv", ".txt")):
-#         decoded = content.decode(encoding, errors="ignore")
-#         sep = detect_separator(decoded)
-#         reader = pd.read_csv(
-#             StringIO(decoded),
-#             sep=sep,
-#             chunksize=CHUNK_SIZE,
-#             low_memory=True,
-#         )
-#
-#         total_rows = 0
-#         chunks = []
-#         iterator = tqdm(reader, desc="Reading CSV", unit="chunk") if USE_TQDM else reader
-#
-#         if use_disk_cache:
-#             base_name = os.path.splitext(os.path.basename(filename))[0]
-#             temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-#
-#             for i, chunk in enumerate(iterator):
-#                 total_rows += len(chunk)
-#                 mode = "overwrite" if i == 0 else "append"
-#                 chunk.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-#             df = pd.read_parquet(temp_parquet_path)
-#         else:
-#             for chunk in iterator:
-#                 chunks.append(chunk)
-#                 total_rows += len(chunk)
-#             df = pd.concat(chunks, ignore_index=True)
-#
-#         print(f"   → {total_rows:,} rows loaded")
-#
-#     # ----- JSON -----
-#     elif filename.endswith(".json"):
-#         try:
-#             df = pd.read_json(BytesIO(content), encoding=encoding, lines=True)
-#         except ValueError:
-#             df = pd.read_json(BytesIO(content), encoding=encoding)
-#         if use_disk_cache:
-#             base_name = os.path.splitext(os.path.basename(filename))[0]
-#             temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-#             df.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-#             df = pd.read_parquet(temp_parquet_path)
-#
-#     # ----- Excel -----
-#     elif filename.endswith((".xlsx", ".xls")):
-#         print("📘 Reading Excel file (non-lazy)...")
-#         df = pd.read_excel(BytesIO(content), engine="openpyxl")
-#         if use_disk_cache:
-#             base_name = os.path.splitext(os.path.basename(filename))[0]
-#             temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-#             df.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-#             df = pd.read_parquet(temp_parquet_path)
-#
-#     # ----- Parquet -----
-#     elif filename.endswith(".parquet"):
-#         df = pd.read_parquet(BytesIO(content))
-#
-#     else:
-#         raise ValueError(f"Unsupported file format: {filename}")
-#
-#     duration = time() - start_time
-#     print(f"✅ Load completed in {duration:.2f}s ({len(df):,} rows, {len(df.columns)} columns)")
-#     if temp_parquet_path:
-#         print(f"   Cached at: {temp_parquet_path}")
-#
-#     return df
-#
-#
-# async def stream_csv(content: bytes, filename: str, chunksize: int = CHUNK_SIZE):
-#     """
-#     Streaming version: yields DataFrame chunks asynchronously.
-#     Uses tqdm for progress visualization if available.
-#     """
-#     encoding = detect_encoding(content)
-#     decoded = content.decode(encoding, errors="ignore")
-#     sep = detect_separator(decoded)
-#
-#     reader = pd.read_csv(StringIO(decoded), sep=sep, chunksize=chunksize, low_memory=True)
-#     iterator = tqdm(reader, desc="Streaming CSV", unit="chunk") if USE_TQDM else reader
-#
-#     for chunk in iterator:
-#         yield chunk
-
+import asyncio
+import hashlib
+import logging
+import multiprocessing
 import os
 import tempfile
+import threading
 import pandas as pd
-from io import BytesIO, StringIO
+import pyarrow as pa
+import pyarrow.csv as pv
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
 from time import time
+from typing import BinaryIO, Optional, Tuple, Union
+from app.core.config import settings
 from app.utils.data_manip import detect_encoding, detect_separator
 
+logger = logging.getLogger(__name__)
+
 try:
     from tqdm import tqdm
     USE_TQDM = True
 except ImportError:
     USE_TQDM = False
 
-CACHE_THRESHOLD = 1 * 1024 * 1024 * 1024  # 1 GB
 CHUNK_SIZE = 500_000  # Rows per chunk for CSV
+CSV_BLOCK_SIZE = 8 << 20  # Bytes handed to each Arrow CSV parsing thread
+SEPARATOR_SAMPLE_BYTES = 1 << 20  # Leading bytes decoded to detect the CSV separator
+ENCODING_SAMPLE_BYTES = 1 << 16  # Leading bytes given to the encoding detector
+SNIFF_CACHE_SIZE = 256  # Samples whose detected encoding and separator are remembered
+HASH_READ_SIZE = 8 << 20  # Bytes read per iteration when hashing an upload
+PARSED_CACHE_SUBDIR = "parsed"  # Folder of cache_dir holding parsed uploads as Parquet
+PARSED_CACHE_MAX_BYTES = 2 << 30  # Least recently used parsed uploads are removed beyond this total
+
+# Sample digest -> (encoding, separator), least recently used first. Keyed on a
+# digest so the samples themselves are not kept; loads run in worker threads.
+_sniff_cache: "OrderedDict[bytes, Tuple[str, str]]" = OrderedDict()
+_sniff_lock = threading.Lock()
+
+# openpyxl parses in pure Python and holds the GIL, so Excel files are parsed
+# in worker processes; created on first use so idle workers never spawn them
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    """Get the Excel parsing process pool, sized from settings.max_parse_workers."""
+    global _parse_pool
+    if _parse_pool is None:
+        # Spawned, not forked: forking copies the running event loop, driver
+        # connections and Arrow's thread pools into each worker
+        _parse_pool = ProcessPoolExecutor(
+            max_workers=settings.max_parse_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Stop the Excel parsing processes, if they were started."""
+    global _parse_pool
+    if _parse_pool is not None:
+        _parse_pool.shutdown(cancel_futures=True)
+        _parse_pool = None
+
+
+def _read_excel(content: Union[bytes, BinaryIO]) -> pd.DataFrame:
+    """Parse an Excel workbook's first sheet."""
+    source = BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    return pd.read_excel(source, engine="openpyxl")
+
+
+def _read_all(content: BinaryIO) -> bytes:
+    """Read a file object from its start, to hand its bytes to another process."""
+    content.seek(0)
+    return content.read()
+
+
+def _detect_sample_separator(sample: bytes, encoding: str) -> str:
+    """Detect the CSV separator from the leading bytes of a file, cut back to whole lines."""
+    last_newline = sample.rfind(b"\n")
+    if last_newline > 0:
+        sample = sample[:last_newline]
+    return detect_separator(sample.decode(encoding, errors="ignore"))
 
 
-async def load_file(content: bytes, filename: str) -> pd.DataFrame:
+def _sniff(sample: bytes) -> Tuple[str, str]:
+    """
+    Detect the encoding and CSV separator of a file's leading bytes in one go.
+    Results are cached on the sample's digest, so re-uploads of the same file
+    (or a preview followed by the full load) skip detection.
+    """
+    key = hashlib.blake2b(sample, digest_size=16).digest()
+    with _sniff_lock:
+        cached = _sniff_cache.get(key)
+        if cached is not None:
+            _sniff_cache.move_to_end(key)
+            return cached
+
+    encoding = detect_encoding(sample[:ENCODING_SAMPLE_BYTES])
+    sniffed = encoding, _detect_sample_separator(sample, encoding)
+    with _sniff_lock:
+        _sniff_cache[key] = sniffed
+        if len(_sniff_cache) > SNIFF_CACHE_SIZE:
+            _sniff_cache.popitem(last=False)
+    return sniffed
+
+
+def _open_source(content: Union[bytes, BinaryIO]) -> Tuple[BinaryIO, str, str]:
+    """
+    Wrap content in a seekable stream rewound to the start, and return it with
+    the encoding and CSV separator detected on its leading bytes.
+    """
+    stream = BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    stream.seek(0)
+    sample = stream.read(SEPARATOR_SAMPLE_BYTES)
+    stream.seek(0)
+    return stream, *_sniff(sample)
+
+
+def _csv_options(encoding: str, separator: str, block_size: int) -> Tuple[pv.ReadOptions, pv.ParseOptions]:
+    """Arrow CSV reader options shared by full loads and previews."""
+    read_options = pv.ReadOptions(encoding=encoding, block_size=block_size, use_threads=True)
+    parse_options = pv.ParseOptions(delimiter=separator)
+    return read_options, parse_options
+
+
+def _load_file_sync(content: Union[bytes, BinaryIO], filename: str) -> pd.DataFrame:
     """
     Efficiently load large files using:
       - Lazy loading (chunked reads)
-      - Temporary on-disk caching (Parquet)
+      - Multithreaded block-wise CSV parsing (Arrow)
       - Progress logs and timing
+
+    content may be the file bytes or a seekable binary file object, such as an
+    UploadFile's underlying file, which is then parsed without reading it into memory first.
     """
     start_time = time()
-    file_size = len(content)
-    encoding = detect_encoding(content)
-    use_disk_cache = file_size >= CACHE_THRESHOLD
+    # Encoding and separator are detected on the leading bytes only
+    stream, encoding, separator = _open_source(content)
+    file_size = stream.seek(0, os.SEEK_END)
+    stream.seek(0)
 
     print(f"Loading file: {filename}")
     print(f"   Approx. size: {file_size / (1024 ** 2):.2f} MB")
     print(f"   Detected encoding: {encoding}")
-    print(f"   Mode: {'disk cache (size > 1GB)' if use_disk_cache else 'in-memory'}")
-
-    temp_parquet_path = None
 
     # ----- CSV / TSV / DSV / TXT -----
     if filename.endswith((".csv", ".tsv", ".dsv", ".txt")):
-        decoded = content.decode(encoding, errors="ignore")
-        sep = detect_separator(decoded)
-        reader = pd.read_csv(
-            StringIO(decoded),
-            sep=sep,
-            chunksize=CHUNK_SIZE,
-            low_memory=True,
-        )
+        # The separator is sniffed on the leading lines only; Arrow decodes the rest itself
+        read_options, parse_options = _csv_options(encoding, separator, CSV_BLOCK_SIZE)
 
-        total_rows = 0
-        chunks = []
-        iterator = tqdm(reader, desc="Reading CSV", unit="chunk") if USE_TQDM else reader
-
-        if use_disk_cache:
-            base_name = os.path.splitext(os.path.basename(filename))[0]
-            temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-
-            for i, chunk in enumerate(iterator):
-                total_rows += len(chunk)
-                # mode = "overwrite" if i == 0 else "append"
-                chunk.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-            df = pd.read_parquet(temp_parquet_path)
-        else:
-            for chunk in iterator:
-                chunks.append(chunk)
-                total_rows += len(chunk)
-            df = pd.concat(chunks, ignore_index=True)
+        # Multithreaded Arrow reader working on the raw bytes, blocks are parsed in
+        # parallel and column types are settled over the whole file, whatever its size
+        table = pv.read_csv(stream, read_options=read_options, parse_options=parse_options)
+        total_rows = table.num_rows
+        # Columns stay Arrow-backed; blocks are released as they are converted
+        df = table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+        del table
 
         print(f"   → {total_rows:,} rows loaded")
 
@@ -221,54 +165,169 @@ async def load_file(content: bytes, filename: str) -> pd.DataFrame:
     elif filename.endswith(".json"):
         try:
             # JSON Lines (streaming style)
-            df = pd.read_json(BytesIO(content), encoding=encoding, lines=True)
+            df = pd.read_json(stream, encoding=encoding, lines=True)
         except ValueError:
             # Standard JSON
-            df = pd.read_json(BytesIO(content), encoding=encoding)
-
-        if use_disk_cache:
-            base_name = os.path.splitext(os.path.basename(filename))[0]
-            temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-            df.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-            df = pd.read_parquet(temp_parquet_path)
+            stream.seek(0)
+            df = pd.read_json(stream, encoding=encoding)
 
     # ----- Excel -----
     elif filename.endswith((".xlsx", ".xls")):
         print("Reading Excel file (non-lazy)...")
-        df = pd.read_excel(BytesIO(content), engine="openpyxl")
-        if use_disk_cache:
-            base_name = os.path.splitext(os.path.basename(filename))[0]
-            temp_parquet_path = os.path.join(tempfile.gettempdir(), f"{base_name}_cache.parquet")
-            df.to_parquet(temp_parquet_path, index=False, engine="pyarrow", compression="snappy")
-            df = pd.read_parquet(temp_parquet_path)
+        df = _read_excel(stream)
 
     # ----- Parquet -----
     elif filename.endswith(".parquet"):
-        # Parquet readers expect a buffer-like object
-        df = pd.read_parquet(BytesIO(content))
+        df = pd.read_parquet(stream)
 
     else:
         raise ValueError(f"Unsupported file format: {filename}")
 
     duration = time() - start_time
     print(f"Load completed in {duration:.2f}s ({len(df):,} rows, {len(df.columns)} columns)")
-    if temp_parquet_path:
-        print(f"   Cached at: {temp_parquet_path}")
 
     return df
 
 
+def _parsed_cache_dir() -> Path:
+    """Directory of the parsed-upload cache."""
+    return Path(settings.cache_dir) / PARSED_CACHE_SUBDIR
+
+
+def _content_digest(content: Union[bytes, BinaryIO], filename: str) -> str:
+    """Hash a file's bytes and extension (which picks the parser), leaving a stream rewound."""
+    hasher = hashlib.blake2b(os.path.splitext(filename)[1].lower().encode("utf-8"), digest_size=16)
+    if isinstance(content, (bytes, bytearray)):
+        hasher.update(content)
+    else:
+        content.seek(0)
+        while chunk := content.read(HASH_READ_SIZE):
+            hasher.update(chunk)
+        content.seek(0)
+    return hasher.hexdigest()
+
+
+def _read_parsed_cache(digest: str) -> Optional[pd.DataFrame]:
+    """Load the frame cached for digest, marking it recently used, or None on a miss."""
+    path = _parsed_cache_dir() / f"{digest}.parquet"
+    try:
+        os.utime(path)
+        return pd.read_parquet(path)
+    except FileNotFoundError:
+        return None
+
+
+def _write_parsed_cache(digest: str, df: pd.DataFrame) -> None:
+    """
+    Cache a parsed frame as zstd Parquet, then remove the least recently used
+    entries until the cache is back under PARSED_CACHE_MAX_BYTES.
+    Frames Parquet cannot store (mixed-type object columns) are not cached.
+    """
+    cache_dir = _parsed_cache_dir()
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    path = cache_dir / f"{digest}.parquet"
+    # Written under a unique temporary name, then renamed: readers never see a
+    # partial file and concurrent uploads of the same content do not share one
+    with tempfile.NamedTemporaryFile(dir=cache_dir, prefix=f"{digest}.", suffix=".partial", delete=False) as tmp:
+        partial_path = Path(tmp.name)
+    try:
+        df.to_parquet(partial_path, index=False, engine="pyarrow", compression="zstd")
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OSError) as e:
+        logger.info(f"Parsed upload not cached: {e}")
+        partial_path.unlink(missing_ok=True)
+        return
+    os.replace(partial_path, path)
+
+    entries = []
+    for entry in cache_dir.glob("*.parquet"):
+        try:
+            stat = entry.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries):
+        if total <= PARSED_CACHE_MAX_BYTES:
+            break
+        entry.unlink(missing_ok=True)
+        total -= size
+
+
+async def load_file(content: Union[bytes, BinaryIO], filename: str) -> pd.DataFrame:
+    """
+    Load a file without blocking the event loop.
+    Parsing runs in a worker thread; Arrow's CSV reader spreads it over its
+    own thread pool from there, so other requests keep being served meanwhile.
+    Excel files, whose parser holds the GIL, go to the process pool instead.
+
+    Parsed frames are cached on disk by content hash, so uploading the same
+    file again skips parsing.
+    """
+    digest = await asyncio.to_thread(_content_digest, content, filename)
+    cached = await asyncio.to_thread(_read_parsed_cache, digest)
+    if cached is not None:
+        logger.info(f"Loaded {filename} from the parsed-upload cache ({len(cached):,} rows, {len(cached.columns)} columns)")
+        return cached
+
+    if filename.endswith((".xlsx", ".xls")):
+        data = content if isinstance(content, (bytes, bytearray)) else await asyncio.to_thread(_read_all, content)
+        loop = asyncio.get_running_loop()
+        df = await loop.run_in_executor(_get_parse_pool(), _read_excel, data)
+        logger.info(f"Loaded {filename} in a parse worker ({len(df):,} rows, {len(df.columns)} columns)")
+    else:
+        df = await asyncio.to_thread(_load_file_sync, content, filename)
+
+    await asyncio.to_thread(_write_parsed_cache, digest, df)
+    return df
+
+
+async def load_file_preview(content: Union[bytes, BinaryIO], filename: str, rows: int) -> pd.DataFrame:
+    """
+    Load only the first rows of a file.
+    CSV-like files are parsed from their first block only; other formats have
+    no cheap partial read and are loaded fully before slicing.
+    """
+    if not filename.endswith((".csv", ".tsv", ".dsv", ".txt")):
+        return (await load_file(content, filename)).head(rows)
+
+    stream, encoding, separator = _open_source(content)
+    read_options, parse_options = _csv_options(encoding, separator, SEPARATOR_SAMPLE_BYTES)
+    reader = pv.open_csv(stream, read_options=read_options, parse_options=parse_options)
+    try:
+        batch = reader.read_next_batch()
+    except StopIteration:
+        return reader.schema.empty_table().to_pandas(types_mapper=pd.ArrowDtype)
+    return batch.slice(0, rows).to_pandas(types_mapper=pd.ArrowDtype)
+
+
+def _iter_csv_chunks(reader: pv.CSVStreamingReader, chunk_size: int):
+    """Regroup the reader's Arrow blocks into DataFrames of chunk_size rows."""
+    pending = []
+    pending_rows = 0
+    for batch in reader:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+        while pending_rows >= chunk_size:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunk_size).to_pandas(types_mapper=pd.ArrowDtype)
+            rest = table.slice(chunk_size)
+            pending = rest.to_batches()
+            pending_rows = rest.num_rows
+    if pending_rows:
+        yield pa.Table.from_batches(pending).to_pandas(types_mapper=pd.ArrowDtype)
+
+
 async def stream_csv(content: bytes, chunk_size: int = CHUNK_SIZE):
     """
     Asynchronous streaming reader: yields DataFrame chunks.
     Uses tqdm if available for progress display.
     """
-    encoding = detect_encoding(content)
-    decoded = content.decode(encoding, errors="ignore")
-    sep = detect_separator(decoded)
+    stream, encoding, separator = _open_source(content)
+    read_options, parse_options = _csv_options(encoding, separator, CSV_BLOCK_SIZE)
+    reader = pv.open_csv(stream, read_options=read_options, parse_options=parse_options)
 
-    reader = pd.read_csv(StringIO(decoded), sep=sep, chunksize=chunk_size, low_memory=True)
-    iterator = tqdm(reader, desc="Streaming CSV", unit="chunk") if USE_TQDM else reader
+    chunks = _iter_csv_chunks(reader, chunk_size)
+    iterator = tqdm(chunks, desc="Streaming CSV", unit="chunk") if USE_TQDM else chunks
 
     for chunk in iterator:
         yield chunk
@@ -1,8 +1,9 @@
 """
 Data ingestion service for loading data from files and databases.
 """
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any, Hashable, cast
+from typing import Dict, List, Optional
 from pathlib import Path
 # import polars as pl
 import pandas as pd
@@ -10,19 +11,37 @@ from fastapi import UploadFile
 
 from app.models.db_config import DBConfig
 from app.models.response_data import TableData
-from app.services.file_loader import load_file # type: ignore
+from app.services.file_loader import load_file, load_file_preview # type: ignore
 from app.services.db_loader import (
     load_table_from_db,
     execute_query,
-    list_tables
+    get_schema_columns
 )
 from app.db.connector import connect_db
+from app.utils.data_manip import frame_to_records
 
 logger = logging.getLogger(__name__)
 
+PREVIEW_ROWS = 5  # Rows loaded per table in preview-only mode
+
+def _build_table_data(table_name: str, df: pd.DataFrame) -> TableData:
+    """Describe a loaded DataFrame: columns, sizes and a five-row preview."""
+    columns = df.columns.to_list()
+    total_rows = len(df)
+    preview = frame_to_records(df.head(PREVIEW_ROWS)) if total_rows > 0 else None
+    return TableData(
+        table_name=table_name,
+        columns=columns,
+        total_rows=total_rows,
+        total_columns=len(columns),
+        preview=preview
+    )
+
+
 async def create_data_frame(
     files: Optional[List[UploadFile]] = None,
-    db_config: Optional[DBConfig] = None
+    db_config: Optional[DBConfig] = None,
+    preview_only: bool = False
 ) -> tuple[Dict[str, TableData], Dict[str, pd.DataFrame]]:
     """
     Create dataframes and table metadata from files or database.
@@ -30,6 +49,7 @@ async def create_data_frame(
     Args:
         files: Optional list of uploaded files
         db_config: Optional database configuration
+        preview_only: Load only PREVIEW_ROWS rows per table (total_rows then counts loaded rows)
         
     Returns:
         Tuple of (table_data_dict, dataframes_dict)
@@ -38,15 +58,16 @@ async def create_data_frame(
         ValueError: If neither files nor db_config is provided
     """
     if files:
-        return await _create_data_frame_from_files(files)
+        return await _create_data_frame_from_files(files, preview_only)
     elif db_config:
-        return await _create_data_frame_from_db(db_config)
+        return await _create_data_frame_from_db(db_config, preview_only)
     else:
         raise ValueError("Either 'files' or 'db_config' must be provided")
 
 
 async def _create_data_frame_from_files(
-    files: List[UploadFile]
+    files: List[UploadFile],
+    preview_only: bool = False
 ) -> tuple[Dict[str, TableData], Dict[str, pd.DataFrame]]:
     """Create dataframes from uploaded files."""
     table_data: Dict[str, TableData] = {}
@@ -54,8 +75,6 @@ async def _create_data_frame_from_files(
     
     for file in files:
         try:
-            # Read file content
-            content = await file.read()
             filename = file.filename or "unknown"
             
             # Generate table name from filename (without extension)
@@ -63,29 +82,18 @@ async def _create_data_frame_from_files(
             
             logger.info(f"Loading file: {filename}")
             
-            # Load as DataFrame
-            df = await load_file(content, filename)
+            # Load as DataFrame, parsing straight from the upload's file object
+            await file.seek(0)
+            if preview_only:
+                df = await load_file_preview(file.file, filename, PREVIEW_ROWS)
+            else:
+                df = await load_file(file.file, filename)
             
-            # Store dataframe
+            # Store dataframe and its metadata
             dataframes[table_name] = df
+            table_data[table_name] = _build_table_data(table_name, df)
             
-            # Create table metadata
-            columns = df.columns.to_list()
-            total_rows = len(df)
-            total_columns = len(columns)
-            
-            # Create preview (first 5 rows as dict)
-            preview = cast(List[Dict[Hashable, Any]], df.head(5).to_dict(orient="records")) if total_rows > 0 else None
-            
-            table_data[table_name] = TableData(
-                table_name=table_name,
-                columns=columns,
-                total_rows=total_rows,
-                total_columns=total_columns,
-                preview=preview
-            )
-            
-            logger.info(f"Loaded {filename}: {total_rows} rows, {total_columns} columns")
+            logger.info(f"Loaded {filename}: {len(df)} rows, {len(df.columns)} columns")
             
         except Exception as e:
             logger.error(f"Error processing file {file.filename}: {e}")
@@ -95,11 +103,13 @@ async def _create_data_frame_from_files(
 
 
 async def _create_data_frame_from_db(
-    db_config: DBConfig
+    db_config: DBConfig,
+    preview_only: bool = False
 ) -> tuple[Dict[str, TableData], Dict[str, pd.DataFrame]]:
     """Create dataframes from database."""
     table_data: Dict[str, TableData] = {}
     dataframes: Dict[str, pd.DataFrame] = {}
+    limit = min(db_config.limit or PREVIEW_ROWS, PREVIEW_ROWS) if preview_only else db_config.limit
     
     try:
         # Connect to database
@@ -108,23 +118,11 @@ async def _create_data_frame_from_db(
         # If query is provided, execute it
         if db_config.query:
             logger.info("Executing custom query")
-            df = await execute_query(engine, db_config.query)
+            df = await execute_query(engine, db_config.query, max_rows=limit if preview_only else None)
             
             table_name = db_config.table_name or "query_result"
             dataframes[table_name] = df
-            
-            columns = df.columns.to_list()
-            total_rows = len(df)
-            total_columns = len(columns)
-            preview = cast(List[Dict[Hashable, Any]], df.head(5).to_dicts()) if total_rows > 0 else None
-            
-            table_data[table_name] = TableData(
-                table_name=table_name,
-                columns=columns,
-                total_rows=total_rows,
-                total_columns=total_columns,
-                preview=preview
-            )
+            table_data[table_name] = _build_table_data(table_name, df)
             
         # If table_name is provided, load that table
         elif db_config.table_name:
@@ -132,66 +130,50 @@ async def _create_data_frame_from_db(
             df = await load_table_from_db(
                 engine,
                 db_config.table_name,
-                limit=db_config.limit,
-                db_type=db_config.db_type
+                limit=limit,
+                db_type=db_config.db_type,
+                columns=db_config.columns,
+                where=db_config.where
             )
             
             table_name = db_config.table_name
             dataframes[table_name] = df
+            table_data[table_name] = _build_table_data(table_name, df)
             
-            columns = df.columns
-            total_rows = len(df)
-            total_columns = len(columns)
-            preview = cast(List[Dict[Hashable, Any]], df.head(5).to_dicts()) if total_rows > 0 else None
-            
-            table_data[table_name] = TableData(
-                table_name=table_name,
-                columns=columns,
-                total_rows=total_rows,
-                total_columns=total_columns,
-                preview=preview
-            )
-            
-        # Otherwise, load all tables
+        # Otherwise, load all tables, as many at once as the pool has connections
         else:
             logger.info("Loading all tables from database")
-            tables = await list_tables(engine)
-            
-            for table_name in tables:
-                try:
-                    df = await load_table_from_db(
+            # One schema snapshot names the tables and their columns for the whole loop
+            schema = await get_schema_columns(engine)
+            tables = list(schema)
+            semaphore = asyncio.Semaphore(engine.pool.size())
+            
+            async def _load_one(table_name: str) -> pd.DataFrame:
+                async with semaphore:
+                    return await load_table_from_db(
                         engine,
                         table_name,
-                        limit=db_config.limit,
-                        db_type=db_config.db_type
-                    )
-                    
-                    dataframes[table_name] = df
-                    
-                    columns = df.columns
-                    total_rows = len(df)
-                    total_columns = len(columns)
-                    preview = cast(List[Dict[Hashable, Any]], df.head(5).to_dicts()) if total_rows > 0 else None
-                    
-                    table_data[table_name] = TableData(
-                        table_name=table_name,
-                        columns=columns,
-                        total_rows=total_rows,
-                        total_columns=total_columns,
-                        preview=preview
+                        limit=limit,
+                        db_type=db_config.db_type,
+                        columns=schema[table_name]
                     )
-                    
-                    logger.info(f"Loaded table {table_name}: {total_rows} rows")
-                    
-                except Exception as e:
-                    logger.warning(f"Failed to load table {table_name}: {e}")
+            
+            results = await asyncio.gather(
+                *(_load_one(table_name) for table_name in tables),
+                return_exceptions=True
+            )
+            
+            for table_name, result in zip(tables, results, strict=True):
+                if isinstance(result, BaseException):
+                    logger.warning(f"Failed to load table {table_name}: {result}")
                     continue
-        
-        engine.dispose()
+                
+                dataframes[table_name] = result
+                table_data[table_name] = _build_table_data(table_name, result)
+                logger.info(f"Loaded table {table_name}: {len(result)} rows")
         
     except Exception as e:
         logger.error(f"Error loading from database: {e}")
         raise
     
     return table_data, dataframes
-
@@ -5,65 +5,126 @@ Neo4j database operations for graph creation.
 Optimized Neo4j database operations for ultra-fast graph creation.
 Single-pass batch processing with minimal overhead.
 """
+import asyncio
 import time
 import logging
-from typing import List, Dict, Any, cast, LiteralString
-from neo4j import AsyncGraphDatabase, AsyncDriver
+from functools import lru_cache
+from typing import AsyncIterator, List, Dict, Any, Tuple, cast, LiteralString
+from neo4j import AsyncGraphDatabase, AsyncDriver, RoutingControl
 
 # from app.core.config import settings
 from app.core.exceptions import Neo4jConnectionError, GraphCreationError
 
 logger = logging.getLogger(__name__)
 
+# Fixed maintenance queries, sent with identical text on every call
+_CLEAR_DATABASE_QUERY: LiteralString = "MATCH (n) DETACH DELETE n"
+# Both unfiltered counts are answered from the count store; one round trip for the pair
+_COUNT_GRAPH_QUERY: LiteralString = """
+CALL { MATCH (n) RETURN count(n) AS total_nodes }
+CALL { MATCH ()-[r]->() RETURN count(r) AS total_relationships }
+RETURN total_nodes, total_relationships
+"""
+
+PERIODIC_COMMIT_ROWS = 1000  # Configs per inner transaction when a batch is committed periodically
+
+# Runs a batch's MERGE statement (passed as $statement) in inner transactions of
+# $commit_size configs each, bounding the transaction state the server holds
+_PERIODIC_MERGE_QUERY: LiteralString = """
+CALL apoc.periodic.iterate(
+    'UNWIND $configs AS cfg RETURN cfg',
+    $statement,
+    {batchSize: $commit_size, parallel: false, params: {configs: $configs}}
+) YIELD updateStatistics, errorMessages
+RETURN updateStatistics, errorMessages
+"""
+
+
+def _quote_name(name: str) -> str:
+    """Backtick-quote a label or relationship type for use in Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+@lru_cache(maxsize=256)
+def _merge_statement(source_label: str, target_label: str, rel_label: str) -> LiteralString:
+    """
+    MERGE statement for one config bound to cfg, for one label combination.
 
-async def _create_batch(session, batch: List[Dict[str, Any]]):
+    Labels are written into the statement rather than passed to APOC, so the
+    planner can seek label/id indexes. Nodes are merged on the id computed by
+    graph_element_props, which is derived from all of their properties.
+    """
+    return cast(LiteralString, f"""
+    MERGE (source:{_quote_name(source_label)} {{id: cfg.source.properties.id}})
+    ON CREATE SET source += cfg.source.properties
+    MERGE (target:{_quote_name(target_label)} {{id: cfg.target.properties.id}})
+    ON CREATE SET target += cfg.target.properties
+    MERGE (source)-[rel:{_quote_name(rel_label)}]->(target)
+    ON CREATE SET rel += coalesce(cfg.rels.properties, {{}})
+    """)
+
+
+@lru_cache(maxsize=256)
+def _merge_query(source_label: str, target_label: str, rel_label: str) -> LiteralString:
+    """Single optimized query for entire batch of one label combination."""
+    return cast(LiteralString, "UNWIND $configs AS cfg" + _merge_statement(source_label, target_label, rel_label))
+
+
+def _batch_labels(cfg: Dict[str, Any]) -> Tuple[str, str, str]:
+    """The (source, target, relationship) labels a config is merged under."""
+    return cfg["source"]["label"], cfg["target"]["label"], cfg["rels"]["label"]
+
+
+async def _write_batch(tx, query: LiteralString, configs: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """Transaction function: run the batch query and return the nodes and relationships created."""
+    result = await tx.run(query, configs=configs)
+    summary = await result.consume()
+    return summary.counters.nodes_created, summary.counters.relationships_created
+
+
+async def _write_periodic_batch(tx, statement: LiteralString, configs: List[Dict[str, Any]]) -> Tuple[int, int]:
+    """
+    Transaction function: commit the batch in PERIODIC_COMMIT_ROWS inner
+    transactions and return the nodes and relationships created.
+    """
+    result = await tx.run(
+        _PERIODIC_MERGE_QUERY,
+        statement=statement,
+        commit_size=PERIODIC_COMMIT_ROWS,
+        configs=configs
+    )
+    record = await result.single()
+    if record["errorMessages"]:
+        raise GraphCreationError(
+            message="Periodic batch commit failed",
+            details={"errors": dict(record["errorMessages"])}
+        )
+    stats = record["updateStatistics"]
+    return stats["nodesCreated"], stats["relationshipsCreated"]
+
+
+async def _create_batch(session, batch: List[Dict[str, Any]], large_batch: bool = False) -> Tuple[int, int]:
     """
     Create nodes and relationships in single query.
 
     This is the core optimization: instead of 3 queries per config,
-    we do 1 query for the entire batch.
+    we do 1 query for the entire batch. All configs of a batch share the
+    same labels. The batch runs as a managed write transaction, so the
+    driver retries it on transient errors such as deadlocks between
+    concurrent batches. With large_batch, the batch is committed in inner
+    transactions of PERIODIC_COMMIT_ROWS configs instead of one transaction.
+
+    Returns:
+        Numbers of nodes and relationships created
     """
     if not batch:
-        return
-
-    # Prepare batch data
-    configs_data = []
-    for cfg in batch:
-        configs_data.append({
-            "source_label": cfg["source"]["label"],
-            "source_props": cfg["source"]["properties"],
-            "target_label": cfg["target"]["label"],
-            "target_props": cfg["target"]["properties"],
-            "rel_label": cfg["rels"]["label"],
-            "rel_props": cfg["rels"].get("properties", {})
-        })
-
-    # Single optimized query for entire batch
-    # Uses UNWIND to process all configs at once
-    query = """
-    UNWIND $configs AS cfg
-    CALL apoc.merge.node(
-        [cfg.source_label], 
-        cfg.source_props
-    ) YIELD node AS source
-    CALL apoc.merge.node(
-        [cfg.target_label], 
-        cfg.target_props
-    ) YIELD node AS target
-    CALL apoc.merge.relationship(
-        source,
-        cfg.rel_label,
-        {},
-        cfg.rel_props,
-        target,
-        {}
-    ) YIELD rel
-    RETURN count(rel) AS created
-    """
+        return 0, 0
 
+    labels = _batch_labels(batch[0])
     try:
-        result = await session.run(query, configs=configs_data)
-        await result.consume()
+        if large_batch:
+            return await session.execute_write(_write_periodic_batch, _merge_statement(*labels), batch)
+        return await session.execute_write(_write_batch, _merge_query(*labels), batch)
     except Exception as e:
         logger.error(f"Batch creation error: {e}")
         raise
@@ -86,7 +147,10 @@ class Neo4jGraphCreation:
             user: str,
             password: str,
             database: str = "neo4j",
-            batch_size: int = 1000
+            batch_size: int = 1000,
+            max_concurrency: int = 8,
+            max_connection_pool_size: int = 50,
+            connection_acquisition_timeout: float = 60.0
     ):
         """
         Initialize Neo4j connection.
@@ -97,20 +161,30 @@ class Neo4jGraphCreation:
             password: Password
             database: Database name
             batch_size: Records per batch
+            max_concurrency: Batches written at the same time, one session each
+            max_connection_pool_size: Pool size floor, raised to fit max_concurrency writers
+            connection_acquisition_timeout: Seconds to wait for a free pooled connection
         """
         self.uri = uri
         self.user = user
         self.password = password
         self.database = database
         self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        # Labels whose id uniqueness constraint is known to exist on this driver
+        self._indexed_labels: set[str] = set()
         self._driver: AsyncDriver = AsyncGraphDatabase.driver(
             self.uri,
             auth=(self.user, self.password),
             max_connection_lifetime=3600,
-            max_connection_pool_size=50,
-            connection_timeout=30
+            max_connection_pool_size=max(max_connection_pool_size, 2 * max_concurrency),
+            connection_timeout=30,
+            connection_acquisition_timeout=connection_acquisition_timeout
+        )
+        logger.info(
+            f"Neo4j service initialized: {uri}, batch_size={batch_size}, "
+            f"max_concurrency={max_concurrency}"
         )
-        logger.info(f"Neo4j service initialized: {uri}, batch_size={batch_size}")
 
     async def _get_driver(self) -> AsyncDriver:
         """Get async driver."""
@@ -123,10 +197,54 @@ class Neo4jGraphCreation:
             self._driver = None
             logger.info("Neo4j driver closed")
 
+    async def ensure_indexes(self, labels: set[str]):
+        """
+        Create a uniqueness constraint on id for each node label not seen yet.
+
+        The constraint backs every MERGE lookup with an index seek instead of
+        a label scan, and keeps concurrent sessions merging the same id from
+        creating duplicate nodes. Each label is handled once per service instance.
+
+        Args:
+            labels: Node labels about to be merged
+        """
+        missing = labels - self._indexed_labels
+        if not missing:
+            return
+
+        driver = await self._get_driver()
+        async with driver.session(database=self.database) as session:
+            for label in sorted(missing):
+                name = _quote_name(label)
+                try:
+                    result = await session.run(cast(LiteralString,
+                        f"CREATE CONSTRAINT IF NOT EXISTS FOR (n:{name}) REQUIRE n.id IS UNIQUE"
+                    ))
+                    await result.consume()
+                    self._indexed_labels.add(label)
+                    continue
+                except Exception as e:
+                    # Typically duplicate ids already in the graph, or a plain id index in the way
+                    logger.warning(
+                        f"Could not create id uniqueness constraint for label {label}, "
+                        f"concurrent batches may create duplicate nodes: {e}"
+                    )
+                try:
+                    result = await session.run(cast(LiteralString,
+                        f"CREATE INDEX IF NOT EXISTS FOR (n:{name}) ON (n.id)"
+                    ))
+                    await result.consume()
+                    self._indexed_labels.add(label)
+                except Exception as e:
+                    # MERGE still works without the index, only slower
+                    logger.warning(f"Could not create id index for label {label}: {e}")
+
     async def create_graph_data(
             self,
             graph_config_list: List[Dict[str, Any]],
-            batch_size: int = None
+            batch_size: int = None,
+            max_concurrency: int = None,
+            large_batch: bool = False
     ) -> Dict[str, Any]:
         """
         Create complete graph (nodes + relationships) in one pass.
@@ -137,6 +255,8 @@ class Neo4jGraphCreation:
         Args:
             graph_config_list: List of graph configurations
             batch_size: Override default batch size
+            max_concurrency: Override default number of batches in flight
+            large_batch: Commit each batch in smaller inner transactions
 
         Returns:
             Simple statistics dict
@@ -157,7 +277,6 @@ class Neo4jGraphCreation:
                 }
             }
         """
-        start_time = time.time()
         total_configs = len(graph_config_list)
 
         if total_configs == 0:
@@ -165,28 +284,107 @@ class Neo4jGraphCreation:
 
         # Use provided batch_size or default
         batch_size = batch_size or self.batch_size
+        max_concurrency = max_concurrency or self.max_concurrency
+
+        # Group configs by label combination, then split each group into batches
+        groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for cfg in graph_config_list:
+            groups.setdefault(_batch_labels(cfg), []).append(cfg)
 
-        # Split into batches
         batches = [
-            graph_config_list[i:i + batch_size]
-            for i in range(0, total_configs, batch_size)
+            group[i:i + batch_size]
+            for group in groups.values()
+            for i in range(0, len(group), batch_size)
         ]
 
         logger.info(f"Creating graph: {total_configs} configs in {len(batches)} batches")
 
+        async def _iter_batches():
+            for batch in batches:
+                yield batch
+
+        return await self.create_graph_stream(
+            _iter_batches(),
+            node_labels={source for source, _, _ in groups} | {target for _, target, _ in groups},
+            max_concurrency=max_concurrency,
+            large_batch=large_batch
+        )
+
+    async def create_graph_stream(
+            self,
+            batches: AsyncIterator[List[Dict[str, Any]]],
+            node_labels: set[str],
+            max_concurrency: int = None,
+            large_batch: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Create graph from batches produced while writing.
+
+        Batches are handed to max_concurrency workers, each holding one pooled
+        session, through a bounded queue. Only a few batches exist at a time,
+        and the first ones are written while later ones are still being built.
+
+        Args:
+            batches: Async iterator of config lists; all configs of a batch share labels
+            node_labels: Every source and target label the batches may contain
+            max_concurrency: Override default number of batches in flight
+            large_batch: Commit each batch in smaller inner transactions, for
+                batches too big to hold in one transaction
+
+        Returns:
+            Simple statistics dict
+        """
+        start_time = time.time()
+        max_concurrency = max_concurrency or self.max_concurrency
+        total_configs = 0
+        total_batches = 0
+        created = {"nodes": 0, "relationships": 0}
+
         try:
+            await self.ensure_indexes(node_labels)
+
             driver = await self._get_driver()
-            async with driver.session(database=self.database) as session:
-                for batch_idx, batch in enumerate(batches, 1):
-                    try:
-                        await _create_batch(session, batch)
-                        logger.info(f"Batch {batch_idx}/{len(batches)} processed ({len(batch)} configs)")
-                    except Exception as e:
-                        logger.error(f"Batch {batch_idx} failed: {e}")
-                        raise GraphCreationError(
-                            message=f"Failed to process batch {batch_idx}",
-                            details={"error": str(e), "batch_size": len(batch)}
-                        )
+            queue: asyncio.Queue = asyncio.Queue(maxsize=max_concurrency * 2)
+            failures: List[GraphCreationError] = []
+
+            async def _worker():
+                async with driver.session(database=self.database) as session:
+                    while (item := await queue.get()) is not None:
+                        if failures:
+                            # Keep draining so the producer never blocks on a full queue
+                            continue
+                        batch_idx, batch = item
+                        try:
+                            nodes, relationships = await _create_batch(session, batch, large_batch)
+                            created["nodes"] += nodes
+                            created["relationships"] += relationships
+                            logger.info(f"Batch {batch_idx} processed ({len(batch)} configs)")
+                        except Exception as e:
+                            logger.error(f"Batch {batch_idx} failed: {e}")
+                            failures.append(GraphCreationError(
+                                message=f"Failed to process batch {batch_idx}",
+                                details={"error": str(e), "batch_size": len(batch)}
+                            ))
+
+            workers = [asyncio.create_task(_worker()) for _ in range(max_concurrency)]
+            try:
+                async for batch in batches:
+                    if failures:
+                        break
+                    if not batch:
+                        continue
+                    total_batches += 1
+                    total_configs += len(batch)
+                    await queue.put((total_batches, batch))
+            finally:
+                for _ in workers:
+                    await queue.put(None)
+                await asyncio.gather(*workers)
+
+            if failures:
+                raise failures[0]
+            if total_configs == 0:
+                raise GraphCreationError("Empty graph configuration list")
 
             elapsed = round(time.time() - start_time, 2)
 
@@ -194,7 +392,9 @@ class Neo4jGraphCreation:
 
             return {
                 "configs_processed": total_configs,
-                "batches": len(batches),
+                "batches": total_batches,
+                "nodes_created": created["nodes"],
+                "relationships_created": created["relationships"],
                 "elapsed_time_sec": elapsed
             }
 
@@ -207,13 +407,17 @@ class Neo4jGraphCreation:
                 details={"error": str(e), "configs": total_configs}
             )
 
-    async def execute_query(self, query: str, parameters: Dict = None):
+    async def execute_query(self, query: LiteralString, parameters: Dict = None, read_only: bool = False):
         """
         Execute custom Cypher query.
 
+        Runs through the driver's execute_query, which manages the session and
+        a retried transaction in one call.
+
         Args:
             query: Cypher query string
             parameters: Query parameters
+            read_only: Route the query to a reader instead of the leader
 
         Returns:
             Query results as list of dicts
@@ -221,11 +425,13 @@ class Neo4jGraphCreation:
         driver = await self._get_driver()
 
         try:
-            async with driver.session(database=self.database) as session:
-                query = cast(LiteralString, query)
-                result = await session.run(query, parameters or {})
-                records = await result.data()
-                return records
+            records, _, _ = await driver.execute_query(
+                query,
+                parameters or {},
+                database_=self.database,
+                routing_=RoutingControl.READ if read_only else RoutingControl.WRITE
+            )
+            return [record.data() for record in records]
         except Exception as e:
             logger.error(f"Query execution failed: {e}")
             raise Neo4jConnectionError(
@@ -241,7 +447,7 @@ class Neo4jGraphCreation:
         logger.warning("Clearing database - all data will be deleted!")
 
         try:
-            await self.execute_query("MATCH (n) DETACH DELETE n")
+            await self.execute_query(_CLEAR_DATABASE_QUERY)
             logger.info("Database cleared")
         except Exception as e:
             logger.error(f"Failed to clear database: {e}")
@@ -255,17 +461,10 @@ class Neo4jGraphCreation:
             Node and relationship counts
         """
         try:
-            # Count nodes
-            nodes_result = await self.execute_query("MATCH (n) RETURN count(n) AS count")
-            total_nodes = nodes_result[0]["count"] if nodes_result else 0
-
-            # Count relationships
-            rels_result = await self.execute_query("MATCH ()-[r]->() RETURN count(r) AS count")
-            total_rels = rels_result[0]["count"] if rels_result else 0
-
+            counts = await self.execute_query(_COUNT_GRAPH_QUERY, read_only=True)
             return {
-                "total_nodes": total_nodes,
-                "total_relationships": total_rels
+                "total_nodes": counts[0]["total_nodes"] if counts else 0,
+                "total_relationships": counts[0]["total_relationships"] if counts else 0
             }
         except Exception as e:
             logger.error(f"Failed to get statistics: {e}")
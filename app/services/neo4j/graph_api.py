@@ -97,12 +97,51 @@ Graph API service for processing graph configurations.
 # ==================================
 
 # import polars as pl
+import asyncio
+from functools import lru_cache
+import numpy as np
 import pandas as pd
 from pydantic import Field
-from typing import List, Dict, Any
-import hashlib
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from app.models.graph_config import GraphConfig
-from .ingest import create_data_frame_from_props_block
+from app.utils.data_manip import check_cols_exist_in_db, frame_to_records
+from .ingest import ColumnIndex, JoinCache, build_column_index, create_data_frame_from_props_block
+
+_ID_HASH_MULTIPLIER = np.uint64(1_000_003)  # Mixes per-column hashes into one row hash
+
+
+@lru_cache(maxsize=256)
+def _name_hashes(label: str, columns: Tuple[str, ...]) -> np.ndarray:
+    """Hashes of the label and of each column name; reused by every batch of a config."""
+    return pd.util.hash_array(np.array([label, *columns], dtype=object))
+
+
+def graph_element_ids(data: pd.DataFrame, label: str) -> List[str]:
+    """
+    Compute a stable id per row from the label and the row's property values.
+
+    Each column is hashed in one vectorized call and the column hashes are
+    combined in sorted column-name order, so the id depends on the label and
+    the property names and values, not on column order.
+    """
+    columns = sorted(data.columns, key=str)
+    name_hashes = _name_hashes(label, tuple(map(str, columns)))
+
+    row_hashes = np.full(len(data), name_hashes[0], dtype=np.uint64)
+    for col, name_hash in zip(columns, name_hashes[1:], strict=True):
+        col_hashes = pd.util.hash_pandas_object(data[col], index=False).to_numpy()
+        row_hashes = row_hashes * _ID_HASH_MULTIPLIER ^ col_hashes ^ name_hash
+    return [f"{h:016x}" for h in row_hashes.tolist()]
+
+
+def _element_records(data: pd.DataFrame, label: str, columns: List[str]) -> List[Dict[str, Any]]:
+    """Build the element dicts of label from already validated columns."""
+    graph_element_df = data[columns]
+    graph_props_list = frame_to_records(
+        graph_element_df.assign(id=graph_element_ids(graph_element_df, label))
+    )
+    return [{"label": label, "properties": props} for props in graph_props_list] # type: ignore
+
 
 def graph_element_props(
     data:pd.DataFrame,
@@ -110,55 +149,110 @@ def graph_element_props(
     props:list[str]
 ) -> List[Dict[str, Any]]:
     try:
-        from app.utils.data_manip import check_cols_exist_in_db
         graph_props, _ = check_cols_exist_in_db(data=data, cols=props) # type: ignore
-        graph_element_df = data[graph_props]
-        graph_props_list = graph_element_df.to_dict(orient="records")
-
-        graph_elements = []
-        for props in graph_props_list: # type: ignore
-            raw_key = f"{label}:{sorted(props.items())}" # type: ignore
-            props["id"] = hashlib.sha1(raw_key.encode()).hexdigest() # type: ignore
-
-            dico = { # type: ignore
-                "label": label,
-                "properties": props
-            }
-            graph_elements.append(dico) # type: ignore
-        return graph_elements # type: ignore
+        return _element_records(data, label, graph_props)
     except Exception as e:
         raise ValueError(e)
 
+def _distinct_used_rows(data: pd.DataFrame, graph_config: GraphConfig) -> pd.DataFrame:
+    """
+    Narrow data to the properties graph_config uses and drop duplicate rows.
+    Rows identical on every property used would yield identical blocs whose
+    MERGEs only re-lock the same nodes.
+    """
+    used_cols = dict.fromkeys(
+        graph_config.source.properties + graph_config.target.properties + graph_config.rels.properties
+    )
+    return data[[col for col in used_cols if col in data.columns]].drop_duplicates()
+
+
+def _resolve_elements(data: pd.DataFrame, graph_config: GraphConfig) -> List[Tuple[str, List[str]]]:
+    """
+    Validate once which property columns exist for source, target and rels.
+    Returns their (label, columns) pairs in that order.
+    """
+    elements = []
+    for element in (graph_config.source, graph_config.target, graph_config.rels):
+        columns, _ = check_cols_exist_in_db(data=data, cols=element.properties)
+        elements.append((element.label, columns))
+    return elements
+
+
+def _build_blocs(data: pd.DataFrame, elements: List[Tuple[str, List[str]]]) -> List[Dict[str, dict]]:
+    """Build the source/target/rels blocs of every row of data from resolved elements."""
+    source_props_list, target_props_list, rels_props_list = (
+        _element_records(data, label, columns) for label, columns in elements
+    )
+
+    # The element dicts are shared, not copied, into each source/target/rels bloc
+    return [
+        {"source": source, "target": target, "rels": rels}
+        for source, target, rels in zip(source_props_list, target_props_list, rels_props_list, strict=True)
+    ] # type: ignore
+
+
 def source_to_target_rels( # type: ignore
     data: pd.DataFrame = Field(..., description="Data Frame that contains all the needed information"),
     graph_config: GraphConfig = Field(..., description="Graph configs that contains all the necessaries graph element configs")
 ) -> List[Dict[str, dict]]: # type: ignore
-    source_props_list = graph_element_props(data=data, label=graph_config.source.label, props=graph_config.source.properties)
-    target_props_list = graph_element_props(data=data, label=graph_config.target.label, props=graph_config.target.properties)
-    rels_props_list = graph_element_props(data=data, label=graph_config.rels.label, props=graph_config.rels.properties)
+    rows = _distinct_used_rows(data, graph_config)
+    return _build_blocs(rows, _resolve_elements(rows, graph_config))
 
-    source_to_target_list = []
-    for source, target, rels in zip(source_props_list, target_props_list, rels_props_list):
-        graph_props_bloc = {
-            "source": source,
-            "target": target,
-            "rels": rels
-        }
-        source_to_target_list.append(graph_props_bloc) # type: ignore
 
-    return source_to_target_list # type: ignore
+def _config_data(
+    data_dico: Dict[str, pd.DataFrame],
+    graph_config: GraphConfig,
+    column_index: Optional[ColumnIndex] = None,
+    join_cache: Optional[JoinCache] = None
+) -> pd.DataFrame:
+    """The dataframe a graph config reads its properties from."""
+    if len(data_dico) > 1:
+        return create_data_frame_from_props_block( # type: ignore
+            data_dico=data_dico, props_block=graph_config,
+            column_index=column_index, join_cache=join_cache
+        )
+    return next(iter(data_dico.values()))
+
+
+async def iter_graph_batches(
+    graph_config_list: List[GraphConfig],
+    data_dico: Dict[str, pd.DataFrame],
+    batch_size: int,
+    limit: Optional[int] = None
+) -> AsyncIterator[List[Dict[str, dict]]]:
+    """
+    Yield graph blocs batch_size at a time, config by config.
+
+    Only the blocs of the batch being yielded are materialized, so a consumer
+    can write each batch before the next one is built. All blocs of a batch
+    come from one config and share its labels. With limit, at most that many
+    blocs are produced in total.
+    """
+    remaining = limit
+    column_index = build_column_index(data_dico) if len(data_dico) > 1 else None
+    join_cache: JoinCache = {}
+    for graph_config_bloc in graph_config_list:
+        if remaining is not None and remaining <= 0:
+            break
+        data = _config_data(data_dico, graph_config_bloc, column_index, join_cache)
+        rows = _distinct_used_rows(data, graph_config_bloc)
+        # Columns are checked once per config, not once per batch
+        elements = _resolve_elements(rows, graph_config_bloc)
+        if remaining is not None:
+            rows = rows.iloc[:remaining]
+            remaining -= len(rows)
+        for start in range(0, len(rows), batch_size):
+            yield _build_blocs(rows.iloc[start:start + batch_size], elements)
+            # Let the writers pick the batch up before the next one is built
+            await asyncio.sleep(0)
+
 
 async def create_graph_api(graph_config_list: List[GraphConfig], data_dico: Dict[str, pd.DataFrame]) -> list: # type: ignore
     full_graph_elements = []
-    if len(data_dico) > 1:
-        for graph_config_bloc in graph_config_list:
-            data = create_data_frame_from_props_block(data_dico=data_dico, props_block=graph_config_bloc) # type: ignore
-            source_to_target_rel = source_to_target_rels(data=data, graph_config=graph_config_bloc) # type: ignore
-            full_graph_elements.extend(source_to_target_rel) # type: ignore
-        pass
-    else:
-        data = list(data_dico.values())[0]
-        for graph_config_bloc in graph_config_list:
-            source_to_target_rel = source_to_target_rels(data=data, graph_config=graph_config_bloc) # type: ignore
-            full_graph_elements.extend(source_to_target_rel) # type: ignore
-    return full_graph_elements # type: ignore
\ No newline at end of file
+    column_index = build_column_index(data_dico) if len(data_dico) > 1 else None
+    join_cache: JoinCache = {}
+    for graph_config_bloc in graph_config_list:
+        data = _config_data(data_dico, graph_config_bloc, column_index, join_cache)
+        source_to_target_rel = source_to_target_rels(data=data, graph_config=graph_config_bloc) # type: ignore
+        full_graph_elements.extend(source_to_target_rel) # type: ignore
+    return full_graph_elements # type: ignore
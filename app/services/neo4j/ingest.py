@@ -1,10 +1,40 @@
 # import polars as pl
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from app.models.graph_config import GraphConfig
 
-def find_data_frame(data_dico: Dict[str, pd.DataFrame], props: List[str]):
-    """Find the first dataframe that contains all the required properties."""
+ColumnIndex = Dict[str, Tuple[int, str]]
+# (dataframe name, selected columns) per participating frame -> combined frame
+JoinCache = Dict[Tuple[Tuple[str, Tuple[str, ...]], ...], pd.DataFrame]
+
+
+def build_column_index(data_dico: Dict[str, pd.DataFrame]) -> ColumnIndex:
+    """Map each column to the position and name of the first dataframe holding it."""
+    index: ColumnIndex = {}
+    for position, (df_name, df) in enumerate(data_dico.items()):
+        for col in df.columns:
+            index.setdefault(col, (position, df_name))
+    return index
+
+
+def find_data_frame(
+    data_dico: Dict[str, pd.DataFrame],
+    props: List[str],
+    column_index: Optional[ColumnIndex] = None
+):
+    """
+    Find the first dataframe that contains the required properties.
+    With a column_index, the dataframe is looked up instead of scanned for.
+    """
+    if column_index is not None:
+        # The first dataframe holding any prop is the earliest of each prop's first holder
+        holders = [column_index[prop] for prop in props if prop in column_index]
+        if not holders:
+            raise ValueError(f"No dataframe found containing all required properties: {props}")
+        _, df_name = min(holders)
+        df = data_dico[df_name]
+        return df_name, df[[prop for prop in props if prop in df.columns]]
+
     from app.utils.data_manip import check_cols_exist_in_db
     for df_name, df in data_dico.items():
         try:
@@ -15,26 +45,46 @@ def find_data_frame(data_dico: Dict[str, pd.DataFrame], props: List[str]):
             continue
     raise ValueError(f"No dataframe found containing all required properties: {props}")
 
-def create_data_frame_from_props_block(data_dico: Dict[str, pd.DataFrame], props_block: GraphConfig): # type: ignore
+def create_data_frame_from_props_block( # type: ignore
+    data_dico: Dict[str, pd.DataFrame],
+    props_block: GraphConfig,
+    column_index: Optional[ColumnIndex] = None,
+    join_cache: Optional[JoinCache] = None
+):
     """
     Args:
         data_dico: set of df name and df values
         props_block: has SOURCE, TARGET AND RELS as attributes
+        column_index: optional build_column_index(data_dico), shared across configs
+        join_cache: optional dict shared across configs; configs reading the same
+            columns of the same dataframes reuse one combined frame
     Task:
-        create Data frame for each props of GraphConfig attributes
-        source_df = data[props_block.source.properties]
-        target_df = data[props_block.target.properties]
-        rels_df = data[props_block.rels.properties]
+        find the dataframe holding each of source, target and rels properties
+        and combine them; properties found in the same dataframe are sliced
+        together, different dataframes are inner-joined on their shared columns
     Returns:
         DataFrame -> data frame that combines the source_df, target_df and rels_df
     """
-    _, source_df = find_data_frame(data_dico=data_dico, props=props_block.source.properties)
-    _, target_df = find_data_frame(data_dico=data_dico, props=props_block.target.properties)
-    _, rels_df = find_data_frame(data_dico=data_dico, props=props_block.rels.properties)
-
-    st_intersection = set(source_df.columns) & set(target_df.columns)
-    st_df_lazy = source_df.join(target_df, on=list(st_intersection), how="right")
-    str_intersection = set(st_df_lazy.columns) & set(rels_df.columns)
-    str_df_lazy = st_df_lazy.join(rels_df, on=list(str_intersection), how="right")
-    str_df = str_df_lazy.collect() # type: ignore
-    return str_df # type: ignore
\ No newline at end of file
+    # Columns needed from each dataframe, in first-seen order
+    needed: Dict[str, Dict[str, None]] = {}
+    for props in (props_block.source.properties, props_block.target.properties, props_block.rels.properties):
+        df_name, df = find_data_frame(data_dico=data_dico, props=props, column_index=column_index)
+        needed.setdefault(df_name, {}).update(dict.fromkeys(df.columns))
+
+    cache_key = tuple((df_name, tuple(cols)) for df_name, cols in needed.items())
+    if join_cache is not None and cache_key in join_cache:
+        return join_cache[cache_key]
+
+    frames = [data_dico[df_name][list(cols)] for df_name, cols in needed.items()]
+    combined = frames[0]
+    for frame in frames[1:]:
+        keys = list(combined.columns.intersection(frame.columns))
+        if not keys:
+            raise ValueError(
+                f"No shared columns to join on between {list(combined.columns)} and {list(frame.columns)}"
+            )
+        combined = combined.merge(frame, on=keys, how="inner")
+
+    if join_cache is not None:
+        join_cache[cache_key] = combined
+    return combined # type: ignore
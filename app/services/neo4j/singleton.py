@@ -1,13 +1,19 @@
 """Neo4j driver singleton for connection management."""
+import asyncio
 import logging
-from typing import Optional
-from neo4j import AsyncGraphDatabase, AsyncDriver
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+from neo4j import READ_ACCESS, WRITE_ACCESS, AsyncGraphDatabase, AsyncDriver, AsyncSession
 
 from app.core.config import settings
 from app.core.exceptions import Neo4jConnectionError
 
 logger = logging.getLogger(__name__)
 
+# Guards instance creation across threads (e.g. sync dependencies run in the threadpool)
+_instance_lock = threading.Lock()
+
 
 class Neo4jDriverSingleton:
     """
@@ -20,11 +26,21 @@ class Neo4jDriverSingleton:
     _instance: Optional['Neo4jDriverSingleton'] = None
     _driver: Optional[AsyncDriver] = None
     _initialized: bool = False
+    # Serializes driver creation so concurrent first calls build one driver;
+    # never taken again once initialized
+    _init_lock: asyncio.Lock = asyncio.Lock()
+
+    # Background connectivity probe shared by status endpoints
+    _probe_task: Optional[asyncio.Task] = None
+    _last_ok: bool = False
+    _last_probe_at: Optional[float] = None
 
     def __new__(cls):
         """Ensure only one instance exists."""
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
+            with _instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
         return cls._instance
 
     async def get_driver(self) -> 'Neo4jDriverSingleton':
@@ -46,6 +62,14 @@ class Neo4jDriverSingleton:
         if self._initialized:
             return
 
+        async with self._init_lock:
+            # Another caller may have initialized the driver while we waited
+            if self._initialized:
+                return
+            await self._create_driver()
+
+    async def _create_driver(self):
+        """Create the driver and verify connectivity; callers hold _init_lock."""
         try:
             logger.info(f"Initializing Neo4j driver: {settings.neo4j_uri}")
 
@@ -56,6 +80,7 @@ class Neo4jDriverSingleton:
                 max_connection_lifetime=settings.neo4j_max_connection_lifetime,
                 max_connection_pool_size=settings.neo4j_max_connection_pool_size,
                 connection_timeout=settings.neo4j_connection_timeout,
+                connection_acquisition_timeout=settings.neo4j_connection_acquisition_timeout,
             )
 
             # Verify connectivity
@@ -67,6 +92,12 @@ class Neo4jDriverSingleton:
         except Exception as e:
             logger.error(f"Failed to initialize Neo4j driver: {e}")
             self._initialized = False
+            # Close the unverified driver so a failed attempt does not leak its pool
+            if self._driver is not None:
+                try:
+                    await self._driver.close()
+                except Exception:
+                    pass
             self._driver = None
             raise Neo4jConnectionError(
                 message="Failed to initialize Neo4j driver",
@@ -107,17 +138,67 @@ class Neo4jDriverSingleton:
             logger.warning(f"Neo4j connection verification failed: {e}")
             return False
 
-    async def execute_query(self, query: str, parameters: dict = None): # type: ignore
+    async def _probe_loop(self, interval: float):
+        """Verify connectivity every interval seconds and record the outcome."""
+        while True:
+            try:
+                if not self._initialized:
+                    await self._initialize_driver()
+                self._last_ok = await self.verify_connection()
+            except Exception as e:
+                logger.warning(f"Neo4j background probe failed: {e}")
+                self._last_ok = False
+            self._last_probe_at = time.monotonic()
+            await asyncio.sleep(interval)
+
+    def start_probe(self, interval: float):
+        """Start the background connectivity probe if it is not running."""
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self._probe_loop(interval))
+
+    async def stop_probe(self):
+        """Cancel the background connectivity probe."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+
+    def last_probe(self) -> Tuple[bool, Optional[float]]:
+        """
+        Get the latest background probe result.
+
+        Returns:
+            Tuple of (connected, age in seconds), age is None before the first probe
+        """
+        if self._last_probe_at is None:
+            return False, None
+        return self._last_ok, time.monotonic() - self._last_probe_at
+
+    async def execute_query(
+            self,
+            query: str,
+            parameters: dict = None, # type: ignore
+            session: Optional[AsyncSession] = None
+    ):
         """
         Execute a Cypher query.
 
         Args:
             query: Cypher query string
             parameters: Query parameters
+            session: Open session to run on, e.g. the request-scoped one from
+                get_neo4j_session; a pooled session is opened for this query otherwise
 
         Returns:
             Query result
         """
+        if session is not None:
+            result = await session.run(query, parameters or {}) # type: ignore
+            return await result.data()
+
         if not self._initialized:
             await self._initialize_driver()
 
@@ -125,6 +206,43 @@ class Neo4jDriverSingleton:
             result = await session.run(query, parameters or {}) # type: ignore
             return await result.data()
 
+    async def stream_query(
+            self,
+            query: str,
+            parameters: Optional[dict] = None,
+            session: Optional[AsyncSession] = None,
+            read_only: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Execute a Cypher query and yield its records one by one as dicts.
+        Rows are pulled from the server fetch_size at a time instead of being
+        collected into one list, so callers can forward them as they arrive.
+
+        Args:
+            query: Cypher query string
+            parameters: Query parameters
+            session: Open session to run on; a pooled session is opened for
+                this query and closed once the iteration ends otherwise
+            read_only: Open that session in read mode (routed to followers on clusters)
+        """
+        if session is not None:
+            result = await session.run(query, parameters or {}) # type: ignore
+            async for record in result:
+                yield record.data()
+            return
+
+        if not self._initialized:
+            await self._initialize_driver()
+
+        async with self._driver.session( # type: ignore
+            database=settings.neo4j_database,
+            fetch_size=settings.neo4j_fetch_size,
+            default_access_mode=READ_ACCESS if read_only else WRITE_ACCESS,
+        ) as session:
+            result = await session.run(query, parameters or {}) # type: ignore
+            async for record in result:
+                yield record.data()
+
     def __repr__(self) -> str:
         """String representation."""
         status = "initialized" if self._initialized else "not initialized"
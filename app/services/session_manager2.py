@@ -1,17 +1,32 @@
+import json
+import logging
 import time
 import pickle
+import shutil
 from typing import Dict, Any, Optional
 from pathlib import Path
 # import polars as pl
+import joblib
 import pandas as pd
+import pyarrow as pa
 from app.models.response_data import TableData
+from app.utils.data_manip import shrink_dtypes
+
+logger = logging.getLogger(__name__)
+
+
+def _pandas_dtype(arrow_type: pa.DataType) -> Optional[pd.ArrowDtype]:
+    """Keep columns Arrow-backed, except dictionary-encoded ones, which come back as categoricals."""
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
 
 class SessionManager:
     """Manages data sessions for caching loaded dataframes and metadata."""
 
-    def __init__(self, cache_dir: str = "cache_dir", session_timeout: int = 3600):
+    def __init__(self, cache_dir: str = "cache_dir", session_timeout: int = 3600, shrink_dtypes: bool = False):
         self.cache_dir = Path(cache_dir)
         self.session_timeout = session_timeout  # 1 hour default
+        self.shrink_dtypes = shrink_dtypes  # Narrow column dtypes before frames are stored
         self._initialized = False
 
         # In-memory session metadata for fast access
@@ -30,6 +45,97 @@ class SessionManager:
         """Get the file path for a session."""
         return self.cache_dir / f"session_{session_id}.pkl"
 
+    def _get_meta_path(self, session_id: str) -> Path:
+        """Get the path of a session's small JSON sidecar (id, timestamps, counts)."""
+        return self.cache_dir / f"session_{session_id}.meta.json"
+
+    def _read_created_at(self, session_id: str) -> float:
+        """
+        Read a session's creation time, from the JSON sidecar when there is one.
+        Sessions saved before sidecars existed fall back to unpickling.
+        """
+        meta_path = self._get_meta_path(session_id)
+        if meta_path.exists():
+            with open(meta_path, 'r') as f:
+                return json.load(f)['created_at']
+        with open(self._get_session_path(session_id), 'rb') as f:
+            return pickle.load(f).get('created_at', 0)
+
+    def _get_tables_dir(self, session_id: str) -> Path:
+        """Get the directory holding a session's Arrow IPC table files."""
+        return self.cache_dir / f"session_{session_id}_tables"
+
+    def _write_tables(self, session_id: str, dataframes: Dict[str, pd.DataFrame]):
+        """
+        Write dataframes as Arrow IPC files.
+
+        Returns the table name -> file name mapping and the names of the
+        frames Arrow could not convert (mixed-type object columns), which are
+        written together to one joblib file instead.
+        """
+        tables_dir = self._get_tables_dir(session_id)
+        tables_dir.mkdir(exist_ok=True)
+
+        arrow_tables: Dict[str, str] = {}
+        pickled: Dict[str, pd.DataFrame] = {}
+        for index, (table_name, df) in enumerate(dataframes.items()):
+            try:
+                table = pa.Table.from_pandas(df)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pickled[table_name] = df
+                continue
+
+            file_name = f"{index}.arrow"
+            with pa.OSFile(str(tables_dir / file_name), 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            arrow_tables[table_name] = file_name
+
+        if pickled:
+            joblib.dump(pickled, tables_dir / "fallback.joblib", protocol=pickle.HIGHEST_PROTOCOL)
+        return arrow_tables, list(pickled)
+
+    def _read_tables(
+            self,
+            session_id: str,
+            arrow_tables: Dict[str, str],
+            fallback_tables: Optional[list] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Memory-map a session's Arrow IPC files back into dataframes, plus any
+        joblib fallback frames. Arrow-backed columns keep pointing into the
+        mapped files, so column data is paged in from the OS cache on access
+        instead of being copied onto the heap.
+        """
+        tables_dir = self._get_tables_dir(session_id)
+        dataframes: Dict[str, pd.DataFrame] = {}
+        if fallback_tables:
+            dataframes.update(joblib.load(tables_dir / "fallback.joblib"))
+        for table_name, file_name in arrow_tables.items():
+            # The map stays open for as long as the column buffers reference it
+            table = pa.ipc.open_file(pa.memory_map(str(tables_dir / file_name), 'r')).read_all()
+            dataframes[table_name] = table.to_pandas(types_mapper=_pandas_dtype)
+        return dataframes
+
+    def _remove_session_files(self, session_id: str):
+        """Remove a session's pickle, sidecar and table files from disk."""
+        for path in (self._get_session_path(session_id), self._get_meta_path(session_id)):
+            if path.exists():
+                path.unlink()
+        shutil.rmtree(self._get_tables_dir(session_id), ignore_errors=True)
+
+    def _quarantine_session(self, session_id: str):
+        """
+        Rename an unreadable session pickle to .corrupt, so listings and cleanup,
+        which only glob *.pkl, stop trying to load it on every call.
+        """
+        session_path = self._get_session_path(session_id)
+        try:
+            session_path.rename(session_path.with_suffix('.corrupt'))
+            logger.warning(f"Quarantined unreadable session file {session_path}")
+        except OSError:
+            logger.exception(f"Failed to quarantine session file {session_path}")
+
     def _load_session_metadata(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Load session metadata from disk."""
         self._ensure_initialized()
@@ -41,17 +147,21 @@ class SessionManager:
         try:
             with open(session_path, 'rb') as f:
                 session_data = pickle.load(f)
+        except FileNotFoundError:
+            # Deleted by another worker since the existence check
+            return None
+        except Exception:
+            logger.exception(f"Error loading session {session_id}")
+            self._quarantine_session(session_id)
+            return None
 
-            # Check if session has expired
-            if time.time() - session_data.get('created_at', 0) > self.session_timeout:
-                self.delete_session(session_id)
-                return None
-
-            return session_data
-        except Exception as e:
-            print(f"Error loading session {session_id}: {e}")
+        # Check if session has expired
+        if time.time() - session_data.get('created_at', 0) > self.session_timeout:
+            self.delete_session(session_id)
             return None
 
+        return session_data
+
     def _save_session_metadata(self, session_id: str, session_data: Dict[str, Any]):
         """Save session metadata to disk."""
         self._ensure_initialized()
@@ -73,6 +183,9 @@ class SessionManager:
         """Create a new session with dataframes and metadata."""
         self._ensure_initialized()
 
+        if self.shrink_dtypes:
+            dataframes = {name: shrink_dtypes(df) for name, df in dataframes.items()}
+
         session_data = { # type: ignore
             'session_id': session_id,
             'created_at': time.time(),
@@ -83,8 +196,27 @@ class SessionManager:
             'dataframes': dataframes  # Store the actual dataframes
         }
 
-        self._save_session_metadata(session_id, session_data) # type: ignore
-        self._sessions[session_id] = session_data
+        # Frames go to Arrow IPC files next to the metadata pickle, so that
+        # saving and reloading a session does not pickle every cell.
+        arrow_tables, fallback_tables = self._write_tables(session_id, dataframes)
+        disk_data = {
+            **session_data,
+            'dataframes': {},
+            'arrow_tables': arrow_tables,
+            'fallback_tables': fallback_tables,
+            'table_order': list(dataframes)
+        }
+
+        self._save_session_metadata(session_id, disk_data) # type: ignore
+        # Expiry checks and listings read this sidecar instead of the pickle
+        with open(self._get_meta_path(session_id), 'w') as f:
+            json.dump({
+                key: session_data[key]
+                for key in ('session_id', 'created_at', 'source_type', 'dataframe_count', 'total_rows')
+            }, f)
+        # Only metadata stays in memory; get_dataframes maps the written files
+        # back in, so the loaded frames are not kept on the heap for the session
+        self._sessions[session_id] = dict(disk_data)
 
         return session_id
 
@@ -93,11 +225,14 @@ class SessionManager:
         # Check in-memory cache first
         if session_id in self._sessions:
             session_data = self._sessions[session_id]
-            # Check if still valid
-            if time.time() - session_data.get('created_at', 0) <= self.session_timeout:
+            # Check if still valid. Every uvicorn worker keeps its own copy of this
+            # dict, so also check the files are still there: another worker may have
+            # deleted or cleaned up the session since it was cached here.
+            if (time.time() - session_data.get('created_at', 0) <= self.session_timeout
+                    and self._get_session_path(session_id).exists()):
                 return session_data
             else:
-                # Expired, remove from memory
+                # Expired or removed, drop it from memory
                 del self._sessions[session_id]
 
         # Load from disk
@@ -107,9 +242,27 @@ class SessionManager:
         return session_data
 
     def get_dataframes(self, session_id: str) -> Optional[Dict[str, pd.DataFrame]]:
-        """Get dataframes for a session."""
+        """
+        Get dataframes for a session.
+        Table files are mapped in again on each call and the frames are not
+        kept in the session, so they are released once the caller is done.
+        """
         session = self.get_session(session_id)
-        return session.get('dataframes') if session else None
+        if not session:
+            return None
+
+        arrow_tables = session.get('arrow_tables')
+        fallback_tables = session.get('fallback_tables')
+        if not (arrow_tables or fallback_tables):
+            return session.get('dataframes')
+
+        loaded = {
+            **session.get('dataframes', {}),
+            **self._read_tables(session_id, arrow_tables or {}, fallback_tables),
+        }
+        # Restore the original table order; lookups take the first matching frame
+        order = session.get('table_order') or list(loaded)
+        return {name: loaded[name] for name in order if name in loaded}
 
     def get_table_data(self, session_id: str) -> Optional[Dict[str, TableData]]:
         """Get table metadata for a session."""
@@ -125,6 +278,9 @@ class SessionManager:
         # Return metadata without the actual dataframes
         info = session.copy()
         info.pop('dataframes', None)
+        info.pop('arrow_tables', None)
+        info.pop('fallback_tables', None)
+        info.pop('table_order', None)
         return info
 
     def delete_session(self, session_id: str) -> bool:
@@ -134,15 +290,17 @@ class SessionManager:
             self._sessions.pop(session_id, None)
 
             # Remove from disk
-            session_path = self._get_session_path(session_id)
-            if session_path.exists():
-                session_path.unlink()
+            self._remove_session_files(session_id)
 
             return True
-        except Exception as e:
-            print(f"Error deleting session {session_id}: {e}")
+        except OSError:
+            logger.exception(f"Error deleting session {session_id}")
             return False
 
+    def count_sessions(self) -> int:
+        """Count sessions held in memory, without touching the disk cache."""
+        return len(self._sessions)
+
     def list_sessions(self) -> Dict[str, Dict[str, Any]]:
         """List all active sessions."""
         self._ensure_initialized()
@@ -163,6 +321,13 @@ class SessionManager:
             for session_file in self.cache_dir.glob("session_*.pkl"):
                 session_id = session_file.stem.replace("session_", "")
                 if session_id not in active_sessions:
+                    # Skip expired sessions without unpickling their metadata
+                    try:
+                        if current_time - self._read_created_at(session_id) > self.session_timeout:
+                            continue
+                    except Exception:
+                        # Unreadable sidecar: loading the pickle below decides, quarantining it if broken
+                        pass
                     session_info = self.get_session_info(session_id)
                     if session_info:
                         active_sessions[session_id] = session_info
@@ -187,20 +352,19 @@ class SessionManager:
         if self.cache_dir.exists():
             for session_file in self.cache_dir.glob("session_*.pkl"):
                 try:
-                    with open(session_file, 'rb') as f:
-                        session_data = pickle.load(f)
+                    created_at = self._read_created_at(session_file.stem.replace("session_", ""))
 
-                    if current_time - session_data.get('created_at', 0) > self.session_timeout:
-                        session_file.unlink()
+                    if current_time - created_at > self.session_timeout:
+                        self._remove_session_files(session_file.stem.replace("session_", ""))
                         removed_count += 1
-                except Exception as e:
+                except Exception:
                     # If we can't read the file, assume it's corrupted and delete it
+                    logger.exception(f"Error cleaning session file {session_file}, removing it")
                     try:
-                        session_file.unlink()
+                        self._remove_session_files(session_file.stem.replace("session_", ""))
                         removed_count += 1
-                    except:
-                        pass
-                    print(f"Error cleaning session file {session_file}: {e}")
+                    except OSError:
+                        logger.exception(f"Failed to remove session files of {session_file}")
 
         return removed_count
 
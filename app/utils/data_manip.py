@@ -1,25 +1,53 @@
-from typing import Tuple, List, Dict
+from typing import Any, Hashable, Optional, Tuple, List, Dict
 # import polars as pl
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import csv
+import codecs
 from charset_normalizer import from_bytes
 
 def check_cols_exist_in_db(data:pd.DataFrame, cols:list[str]) -> Tuple[List[str], Dict[str, str]]:
-    columns = data.columns
-    exists: list[str] = []
-    info: dict[str, str] = {}
-    for col in cols:
-        if col in columns:
-            exists.append(col)
-            info[col] = "exist in data columns"
-        else:
-            info[col] = "not in data columns"
+    # One hashed set built up front instead of a pandas Index lookup per column
+    columns = frozenset(data.columns)
+    exists = [col for col in cols if col in columns]
+    info = {col: "exist in data columns" if col in columns else "not in data columns" for col in cols}
     if exists:
         return exists, info
     else:
         raise ValueError("Your columns does not exist in the data columns")
 
-def detect_separator(text: str) -> str:
+SEPARATOR_CANDIDATES = ",;\t|:"  # Delimiters detect_separator chooses from, preferred first on ties
+SEPARATOR_SAMPLE_LINES = 50  # Leading lines whose delimiter counts are compared
+
+
+def _count_separator(text: str) -> Optional[str]:
+    """
+    Pick the candidate found on every leading line with the most consistent
+    count per line (ties go to the higher count, then to candidate order).
+    Returns None when no candidate appears on every line.
+    """
+    lines = [line for line in text.splitlines()[:SEPARATOR_SAMPLE_LINES] if line]
+    scores: Dict[str, Tuple[float, float, int]] = {}
+    for rank, sep in enumerate(SEPARATOR_CANDIDATES):
+        counts = [line.count(sep) for line in lines]
+        if not counts or min(counts) == 0:
+            continue
+        mean = sum(counts) / len(counts)
+        variance = sum((count - mean) ** 2 for count in counts) / len(counts)
+        scores[sep] = (variance, -mean, rank)
+    return min(scores, key=scores.__getitem__) if scores else None
+
+
+def detect_separator(text: str, strict: bool = False) -> str:
+    """
+    Detect the delimiter of a CSV sample by counting candidates per line.
+    csv.Sniffer is only used when strict is set or counting finds no candidate.
+    """
+    if not strict:
+        sep = _count_separator(text)
+        if sep is not None:
+            return sep
     try:
         sniffer = csv.Sniffer()
         dialect = sniffer.sniff(text, delimiters=",;\t|:")
@@ -30,5 +58,57 @@ def detect_separator(text: str) -> str:
         raise ValueError(f"Error : {e}")
 
 def detect_encoding(content: bytes) -> str:
+    # Most uploads are UTF-8 (or plain ASCII): a C-level decode confirms it without
+    # the statistical scan. final=False tolerates a character cut at the sample's end.
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(content, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
     result = from_bytes(content).best()
-    return result.encoding if result else "utf-8"
\ No newline at end of file
+    return result.encoding if result else "utf-8"
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[Hashable, Any]]:
+    """
+    Convert rows to plain dicts.
+    Arrow-backed columns report missing values as pd.NA and categoricals as NaN,
+    which neither the JSON encoders nor the Neo4j driver accept, so those become None.
+    """
+    arrow_cols = [
+        col for col, dtype in df.dtypes.items()
+        if isinstance(dtype, (pd.ArrowDtype, pd.CategoricalDtype))
+    ]
+    if arrow_cols:
+        df = df.astype({col: object for col in arrow_cols})
+        df[arrow_cols] = df[arrow_cols].where(df[arrow_cols].notna(), None)
+    return df.to_dict(orient="records")
+
+
+CATEGORY_MAX_RATIO = 0.5  # Text columns with fewer distinct values per row than this become categoricals
+
+
+def shrink_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Store columns in narrower dtypes without changing their values:
+      - non-negative integer columns as the smallest unsigned integer type
+      - low-cardinality text columns as categoricals
+
+    Only conversions that keep graph_element_ids stable are made: unsigned
+    integers and categoricals hash like the int64 and string values they hold,
+    whereas narrowing negative integers or floats would change row ids.
+    """
+    converted: Dict[Hashable, Any] = {}
+    for col, dtype in df.dtypes.items():
+        series = df[col]
+        if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            low, high = series.min(), series.max()
+            if pd.isna(low) or low < 0:
+                continue
+            target = np.min_scalar_type(int(high))
+            if target.itemsize >= dtype.itemsize:
+                continue
+            converted[col] = pd.ArrowDtype(pa.from_numpy_dtype(target)) if isinstance(dtype, pd.ArrowDtype) else target
+        elif pd.api.types.is_string_dtype(dtype) and len(series):
+            if series.nunique() < len(series) * CATEGORY_MAX_RATIO:
+                converted[col] = "category"
+    return df.astype(converted) if converted else df
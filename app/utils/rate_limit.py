@@ -0,0 +1,86 @@
+"""
+In-memory token buckets keyed by client, shared by the rate limiting
+middleware and the per-endpoint rate limit dependency.
+"""
+from collections import OrderedDict
+from typing import Tuple
+
+
+class LRUDict(OrderedDict):
+    """
+    OrderedDict capped at ``maxsize`` entries.
+    Writes mark the key as most recently used; the least recently used key is evicted on overflow.
+    """
+
+    def __init__(self, maxsize: int = 50_000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+
+class TokenBuckets:
+    """
+    One token bucket per key (usually a client IP), refilled continuously.
+
+    At most ``max_keys`` buckets are kept, least recently seen evicted first.
+    Keys idle long enough for their bucket to refill completely are dropped as
+    well, since a full bucket is the same as no entry.
+    """
+
+    def __init__(self, rate: float, capacity: float, max_keys: int = 50_000):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Bucket size, the largest burst allowed
+            max_keys: Max number of buckets kept in memory
+        """
+        self.rate = rate
+        self.capacity = float(capacity)
+        # Seconds for an empty bucket to refill completely
+        self._idle_ttl = self.capacity / rate
+        # key -> (tokens, last_refill), ordered from least to most recently seen
+        self._buckets: "LRUDict[str, Tuple[float, float]]" = LRUDict(maxsize=max_keys)
+
+    def _store(self, key: str, tokens: float, current_time: float) -> None:
+        """Save bucket state and expire idle keys from the least recently seen end."""
+        self._buckets[key] = (tokens, current_time)
+        expire_before = current_time - self._idle_ttl
+        while self._buckets:
+            oldest_key = next(iter(self._buckets))
+            if self._buckets[oldest_key][1] >= expire_before:
+                break
+            del self._buckets[oldest_key]
+
+    def acquire(self, key: str, current_time: float) -> Tuple[bool, float]:
+        """
+        Take one token from key's bucket.
+
+        Args:
+            key: Bucket key
+            current_time: time.monotonic() value of the request
+
+        Returns:
+            Tuple of (allowed, tokens left in the bucket)
+        """
+        # Refill the bucket for the time elapsed since the last request
+        tokens, last_refill = self._buckets.get(key, (self.capacity, current_time))
+        tokens = min(self.capacity, tokens + (current_time - last_refill) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._store(key, tokens, current_time)
+        return allowed, tokens
+
+    def retry_after(self, tokens: float) -> int:
+        """Whole seconds until a bucket holding tokens has one token again."""
+        return max(1, int((1 - tokens) / self.rate + 0.5))
+
+    def seconds_to_full(self, tokens: float) -> float:
+        """Seconds until a bucket holding tokens is full again."""
+        return (self.capacity - tokens) / self.rate
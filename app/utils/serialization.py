@@ -0,0 +1,24 @@
+"""
+JSON serialization helpers.
+Uses orjson when it is installed and falls back to the standard library otherwise.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+try:
+    import orjson
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
+# Response class used by the application for JSON payloads
+DefaultJSONResponse = ORJSONResponse if USE_ORJSON else JSONResponse
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize content to JSON bytes, for payloads that are built once and reused."""
+    if USE_ORJSON:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
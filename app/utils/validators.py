@@ -0,0 +1,44 @@
+"""
+Input validation helpers.
+"""
+import re
+
+# Comments, string literals (with escapes) and numeric literals not glued to an identifier or $parameter.
+# Scanned in a single pass so `//` inside a string is not taken for a comment.
+_CYPHER_TOKEN_RE = re.compile(
+    r"""(?P<comment>//[^\n]*|/\*.*?\*/)"""
+    r"""|'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*\""""
+    r"""|(?<![\w$.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b""",
+    re.DOTALL
+)
+_CYPHER_WRITE_RE = re.compile(r"\b(?:CREATE|MERGE|DELETE|SET|REMOVE|DROP|CALL|LOAD\s+CSV|FOREACH)\b", re.IGNORECASE)
+# Functions whose result changes between calls: random values, and the current
+# time (temporal constructors called without arguments or with only an options map)
+_CYPHER_NONDETERMINISTIC_RE = re.compile(
+    r"\b(?:rand|randomUUID|timestamp)\s*\("
+    r"|\b(?:date|time|datetime|localtime|localdatetime)(?:\.(?:transaction|statement|realtime))?\s*\(\s*(?:\)|\{)",
+    re.IGNORECASE
+)
+
+
+def strip_cypher_literals(query: str) -> str:
+    """Remove comments and replace literals by `?`, keeping only the shape of the query."""
+    return _CYPHER_TOKEN_RE.sub(lambda m: " " if m.group("comment") else "?", query)
+
+
+def count_cypher_literals(query: str) -> int:
+    """Count inline string and number literals in a Cypher query."""
+    return sum(1 for m in _CYPHER_TOKEN_RE.finditer(query) if not m.group("comment"))
+
+
+def is_cypher_write(query: str) -> bool:
+    """
+    Check whether a Cypher query may modify the graph.
+    Procedure calls are treated as writes since their effects are unknown.
+    """
+    return _CYPHER_WRITE_RE.search(strip_cypher_literals(query)) is not None
+
+
+def is_cypher_nondeterministic(query: str) -> bool:
+    """Check whether a Cypher query calls functions that return a different value on each run."""
+    return _CYPHER_NONDETERMINISTIC_RE.search(strip_cypher_literals(query)) is not None